@@ -1,27 +1,96 @@
-from typing import Optional, Dict, Any
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Optional, Dict, Any, Tuple
 from fastapi import HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
-from database import User, Character
+from database import User, Character, normalize_name
 
 MASTER_PASSWORD = "2365"  # Пароль для мастера
 
+LOGIN_CACHE_SIZE = 1024
+LOGIN_CACHE_TTL = 300.0
+
+
+class CharacterNameCache:
+    """
+    name_key -> (character id, name), LRU with TTL.
+    Concurrent misses for the same name share one query (login storms).
+    """
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[float, Tuple[int, str]]]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    async def lookup(self, name_key: str, db: AsyncSession) -> Optional[Tuple[int, str]]:
+        entry = self._entries.get(name_key)
+        if entry and entry[0] > time.monotonic():
+            self._entries.move_to_end(name_key)
+            return entry[1]
+
+        inflight = self._inflight.get(name_key)
+        if inflight is not None:
+            try:
+                return await asyncio.shield(inflight)
+            except asyncio.CancelledError:
+                # Only retry if the request that ran the query was cancelled
+                if not inflight.cancelled():
+                    raise
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[name_key] = future
+        try:
+            result = await db.execute(
+                select(Character.id, Character.name)
+                .where(Character.name_key == name_key)
+                .order_by(Character.id)
+                .limit(1)
+            )
+            row = result.first()
+            value = (row.id, row.name) if row else None
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark retrieved so an unobserved failure is not logged
+            future.exception()
+            raise
+        finally:
+            del self._inflight[name_key]
+
+        future.set_result(value)
+        # Misses are not cached: a character may be imported at any moment
+        if value:
+            self._entries[name_key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(name_key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+character_name_cache = CharacterNameCache(LOGIN_CACHE_SIZE, LOGIN_CACHE_TTL)
+
 
 async def authenticate_player(character_name: str, db: AsyncSession) -> Dict[str, Any]:
     """Аутентификация игрока по имени персонажа"""
-    result = await db.execute(
-        select(Character).where(Character.name.ilike(character_name))
-    )
-    character = result.scalar_one_or_none()
+    character = await character_name_cache.lookup(normalize_name(character_name), db)
     
     if not character:
         raise HTTPException(status_code=404, detail="Персонаж не найден")
     
+    character_id, name = character
     return {
         "type": "player",
-        "character_id": character.id,
-        "character_name": character.name
+        "character_id": character_id,
+        "character_name": name
     }
 
 
@@ -0,0 +1,88 @@
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from fastapi import Request, Response
+
+from api.responses import dump_json
+from config import CATALOG_CACHE_TTL, CATALOG_CACHE_MAX_ENTRIES
+
+# (etag, serialized body)
+Entry = Tuple[str, bytes]
+
+
+class MemoryCacheBackend:
+    """In-process LRU with per-entry TTL"""
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, Entry]]" = OrderedDict()
+
+    async def get(self, key: str) -> Optional[Entry]:
+        item = self._entries.get(key)
+        if item is None:
+            return None
+        expires_at, entry = item
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    async def set(self, key: str, entry: Entry, ttl: float) -> None:
+        self._entries[key] = (time.monotonic() + ttl, entry)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def delete_prefix(self, prefix: str) -> None:
+        for key in [key for key in self._entries if key.startswith(prefix)]:
+            del self._entries[key]
+
+
+class ResponseCache:
+    """
+    Read-through cache of JSON responses with ETag support.
+    Keys are "<namespace>:<filters>"; writes invalidate whole namespaces.
+    Any object with async get/set/delete_prefix (e.g. a Redis wrapper shared
+    by all workers) can replace the in-process backend.
+    """
+
+    def __init__(self, backend, ttl: float):
+        self.backend = backend
+        self.ttl = ttl
+        # Bumped on invalidation so a load racing with a write is not stored
+        self._generations: Dict[str, int] = {}
+
+    async def respond(
+        self,
+        request: Request,
+        namespace: str,
+        load: Callable[[], Awaitable[Any]],
+        **filters: Any
+    ) -> Response:
+        key = namespace + ":" + "&".join(f"{name}={value}" for name, value in sorted(filters.items()))
+
+        entry = await self.backend.get(key)
+        if entry is None:
+            generation = self._generations.get(namespace, 0)
+            body = dump_json(await load())
+            entry = ('"' + hashlib.sha1(body).hexdigest() + '"', body)
+            if self._generations.get(namespace, 0) == generation:
+                await self.backend.set(key, entry, self.ttl)
+
+        etag, body = entry
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if etag in request.headers.get("if-none-match", ""):
+            return Response(status_code=304, headers=headers)
+        return Response(content=body, media_type="application/json", headers=headers)
+
+    async def invalidate(self, *namespaces: str) -> None:
+        for namespace in namespaces:
+            self._generations[namespace] = self._generations.get(namespace, 0) + 1
+            await self.backend.delete_prefix(namespace + ":")
+
+
+# Master catalogs: items, mobs, locations
+catalog_cache = ResponseCache(MemoryCacheBackend(CATALOG_CACHE_MAX_ENTRIES), CATALOG_CACHE_TTL)
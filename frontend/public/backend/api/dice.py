@@ -0,0 +1,134 @@
+import random
+import re
+from functools import lru_cache
+from typing import List, Optional, Sequence, Tuple
+
+# Guards against patterns that would tie up a worker
+MAX_DICE = 1000
+MAX_SIDES = 1_000_000
+MAX_EXPLOSIONS = 1000
+
+# One signed term: [N]dM[!][kh|kl[K]] or a constant
+_TERM_RE = re.compile(r'([+-]?)(?:(\d*)d(\d+)(!?)(?:(kh|kl)(\d*))?|(\d+))')
+# Custom range: "1-100" is a uniform roll, not one minus one hundred
+_RANGE_RE = re.compile(r'^(\d+)-(\d+)$')
+
+_rng = random.Random()
+
+
+class DiceTerm:
+    """NdM with optional exploding (!) and keep-highest/lowest (khK/klK)"""
+
+    __slots__ = ("sign", "count", "faces", "explode", "keep", "keep_count")
+
+    def __init__(self, sign: int, count: int, sides: int, explode: bool, keep: Optional[str], keep_count: int):
+        self.sign = sign
+        self.count = count
+        self.faces = range(1, sides + 1)
+        self.explode = explode
+        self.keep = keep
+        self.keep_count = keep_count
+
+    def roll(self) -> int:
+        if self.count == 1 and not self.explode:
+            return self.sign * self.faces[int(_rng.random() * len(self.faces))]
+
+        # All dice of the term in one call instead of one randint per die
+        rolls = _rng.choices(self.faces, k=self.count)
+
+        if self.explode:
+            sides = self.faces[-1]
+            extra = rolls.count(sides)
+            budget = MAX_EXPLOSIONS
+            while extra and budget:
+                extra = min(extra, budget)
+                budget -= extra
+                new_rolls = _rng.choices(self.faces, k=extra)
+                rolls.extend(new_rolls)
+                extra = new_rolls.count(sides)
+
+        if self.keep:
+            rolls.sort(reverse=self.keep == "kh")
+            rolls = rolls[:self.keep_count]
+
+        return self.sign * sum(rolls)
+
+
+class DiceExpression:
+    """Parsed pattern: a sum of dice terms plus a constant, or a custom range"""
+
+    __slots__ = ("terms", "constant", "range")
+
+    def __init__(self, terms: Tuple[DiceTerm, ...] = (), constant: int = 0, range_: Optional[Tuple[int, int]] = None):
+        self.terms = terms
+        self.constant = constant
+        self.range = range_
+
+    def roll(self) -> int:
+        if self.range:
+            return _rng.randint(*self.range)
+        total = self.constant
+        for term in self.terms:
+            total += term.roll()
+        return total
+
+
+@lru_cache(maxsize=1024)
+def parse(pattern: str) -> DiceExpression:
+    """
+    Parse a dice pattern; raises ValueError if it is invalid.
+    Supports d20, 2d6+1, 4d6kh3, 2d20kl1, 3d6!, 1d8+1d6-2, 1-100 and plain numbers.
+    """
+    text = pattern.strip().lower().replace(" ", "")
+
+    range_match = _RANGE_RE.match(text)
+    if range_match:
+        min_val, max_val = int(range_match.group(1)), int(range_match.group(2))
+        if min_val > max_val:
+            raise ValueError(f"Invalid dice pattern: {pattern}")
+        return DiceExpression(range_=(min_val, max_val))
+
+    terms: List[DiceTerm] = []
+    constant = 0
+    dice_total = 0
+    pos = 0
+    while pos < len(text):
+        match = _TERM_RE.match(text, pos)
+        # Every term after the first needs an explicit sign
+        if not match or match.end() == pos or (pos and not match.group(1)):
+            raise ValueError(f"Invalid dice pattern: {pattern}")
+        pos = match.end()
+
+        sign, count, sides, explode, keep, keep_count, number = match.groups()
+        sign = -1 if sign == "-" else 1
+        if number is not None:
+            constant += sign * int(number)
+            continue
+
+        count = int(count) if count else 1
+        sides = int(sides)
+        keep_count = int(keep_count) if keep_count else 1
+        dice_total += count
+        if not 1 <= sides <= MAX_SIDES or dice_total > MAX_DICE or (explode and sides == 1):
+            raise ValueError(f"Invalid dice pattern: {pattern}")
+        # Keep 1..N of the N dice rolled (the single-die fast path relies on it)
+        if keep and not 1 <= keep_count <= count:
+            raise ValueError(f"Invalid dice pattern: {pattern}")
+        if count:
+            terms.append(DiceTerm(sign, count, sides, bool(explode), keep, keep_count))
+
+    if not text:
+        raise ValueError(f"Invalid dice pattern: {pattern}")
+
+    return DiceExpression(tuple(terms), constant)
+
+
+def roll(pattern: str) -> int:
+    """Roll a dice pattern"""
+    return parse(pattern).roll()
+
+
+def roll_many(patterns: Sequence[str]) -> List[int]:
+    """Roll several patterns at once; invalid patterns raise before any roll"""
+    expressions = [parse(pattern) for pattern in patterns]
+    return [expression.roll() for expression in expressions]
@@ -0,0 +1,130 @@
+import asyncio
+import logging
+from typing import Any, Dict, Optional, Set
+
+from api.responses import dump_json
+
+logger = logging.getLogger(__name__)
+
+# Queued after the last event when the hub closes; ends the stream
+CLOSED = object()
+
+
+class Subscription:
+    """Очередь событий одного подписчика"""
+
+    def __init__(self, queue_size: int, character_id: Optional[int] = None):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.character_id = character_id
+        self.dropped = 0
+
+    def offer(self, event: Dict[str, Any]) -> None:
+        """Put event without blocking; a full queue drops its oldest event"""
+        if self.character_id is not None and event.get("character_id") != self.character_id:
+            return
+        if self.queue.full():
+            try:
+                self.queue.get_nowait()
+            except asyncio.QueueEmpty:
+                pass
+            self.dropped += 1
+        self.queue.put_nowait(event)
+
+    def close(self) -> None:
+        """Queue CLOSED behind any pending events (dropping the oldest if full)"""
+        if self.queue.full():
+            try:
+                self.queue.get_nowait()
+            except asyncio.QueueEmpty:
+                pass
+        self.queue.put_nowait(CLOSED)
+
+
+class EventHub:
+    """In-process pub/sub: every publish fans out to all subscribers.
+
+    Each subscriber has its own bounded queue, so a slow client only loses
+    its own oldest events and never blocks the publisher or other clients.
+    """
+
+    def __init__(self, queue_size: int = 100):
+        self.queue_size = queue_size
+        self._subscribers: Set[Subscription] = set()
+        self.closed = False
+
+    def subscribe(self, character_id: Optional[int] = None) -> Subscription:
+        subscription = Subscription(self.queue_size, character_id)
+        if self.closed:
+            subscription.close()
+        else:
+            self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        self._subscribers.discard(subscription)
+
+    def publish(self, event: Dict[str, Any]) -> None:
+        for subscription in list(self._subscribers):
+            subscription.offer(event)
+
+    def close(self) -> None:
+        """End every open stream, e.g. on shutdown, so the server can drain"""
+        self.closed = True
+        for subscription in list(self._subscribers):
+            subscription.close()
+        self._subscribers.clear()
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    @property
+    def queued(self) -> int:
+        """Events waiting in all subscriber queues"""
+        return sum(subscription.queue.qsize() for subscription in self._subscribers)
+
+
+def format_sse(event: str, data: Any) -> str:
+    """Format a Server-Sent Events message"""
+    payload = dump_json(data).decode("utf-8")
+    return f"event: {event}\ndata: {payload}\n\n"
+
+
+async def stream_events(
+    subscription: Subscription,
+    hub: EventHub,
+    snapshot: Any,
+    heartbeat: float = 15.0,
+    event_name: str = "roll"
+):
+    """SSE generator: one snapshot, then deltas (as event_name) until the client disconnects or the hub closes"""
+    try:
+        yield format_sse("snapshot", snapshot)
+        while True:
+            try:
+                event = await asyncio.wait_for(subscription.queue.get(), timeout=heartbeat)
+            except asyncio.TimeoutError:
+                # Comment line keeps proxies from closing an idle connection
+                yield ": keep-alive\n\n"
+                continue
+            if event is CLOSED:
+                return
+
+            if subscription.dropped:
+                # Client fell behind: tell it to reload the snapshot
+                yield format_sse("resync", {"dropped": subscription.dropped})
+                subscription.dropped = 0
+            yield format_sse(event_name, event)
+    finally:
+        hub.unsubscribe(subscription)
+
+
+# Live dice roll feed
+dice_hub = EventHub()
+# New notes, e.g. master broadcasts
+note_hub = EventHub()
+
+
+def close_event_streams() -> None:
+    for hub in (dice_hub, note_hub):
+        hub.close()
@@ -1,20 +1,38 @@
+import asyncio
+import threading
 import openpyxl
-from typing import Dict, List, Any
+from typing import Dict, List, Any, BinaryIO, Callable, Iterator, Optional, Tuple, Union
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, insert, update, or_, bindparam
 from datetime import datetime
 import json
 
-from database import Character, Mob, Location, Item, NoteTemplate
+from database import normalize_name, Character, Mob, Location, Item, NoteTemplate
 
+# Max bound parameters per prefetch query (asyncpg allows 32767)
+PREFETCH_CHUNK_SIZE = 5000
 
-async def import_excel_data(file_path: str, db: AsyncSession) -> Dict[str, Any]:
+# Rows per parsed batch and batches buffered between parser and writer
+IMPORT_BATCH_SIZE = 1000
+IMPORT_QUEUE_SIZE = 4
+
+Row = Tuple[int, Dict[str, Any]]
+Record = Dict[str, Any]
+
+
+class ImportCancelled(Exception):
+    """Raised in the parser thread when the writer has stopped"""
+
+
+async def import_excel_data(source: Union[str, BinaryIO], db: AsyncSession) -> Dict[str, Any]:
     """
-    Import data from Excel file.
+    Import data from Excel file (path or seekable binary file object).
     Expected sheets: characters, mobs, locations, items, notes_templates
+
+    The workbook is parsed read-only in a worker thread and row batches are
+    handed to the database writer through a bounded queue, so the event loop
+    stays free and memory holds only a few batches at a time.
     """
-    workbook = openpyxl.load_workbook(file_path, data_only=True)
-    
     result = {
         "characters": {"created": 0, "updated": 0, "errors": []},
         "mobs": {"created": 0, "updated": 0, "errors": []},
@@ -22,270 +40,390 @@ async def import_excel_data(file_path: str, db: AsyncSession) -> Dict[str, Any]:
         "items": {"created": 0, "updated": 0, "errors": []},
         "notes_templates": {"created": 0, "updated": 0, "errors": []}
     }
-    
-    # Import characters
-    if "characters" in workbook.sheetnames:
-        sheet = workbook["characters"]
-        headers = [cell.value for cell in sheet[1]]
-        
-        for row_idx, row in enumerate(sheet.iter_rows(min_row=2, values_only=False), start=2):
-            try:
-                row_data = {headers[i]: cell.value for i, cell in enumerate(row) if i < len(headers)}
-                
-                if not row_data.get("name"):
-                    continue
-                
-                # Check if character exists (by id or name)
-                char_id = row_data.get("id")
-                if char_id:
-                    query = select(Character).where(Character.id == char_id)
-                    existing = (await db.execute(query)).scalar_one_or_none()
-                else:
-                    query = select(Character).where(Character.name == row_data["name"])
-                    existing = (await db.execute(query)).scalar_one_or_none()
-                
-                # Parse stats
-                stats = {}
-                if row_data.get("stats"):
-                    try:
-                        if isinstance(row_data["stats"], str):
-                            stats = json.loads(row_data["stats"])
-                        else:
-                            stats = row_data["stats"]
-                    except:
-                        # Try parsing individual columns
-                        for key in ["str", "dex", "int", "con", "wis", "cha"]:
-                            if key in row_data and row_data[key] is not None:
-                                stats[key] = int(row_data[key])
-                
-                # Parse abilities
-                abilities = []
-                if row_data.get("abilities"):
-                    if isinstance(row_data["abilities"], str):
-                        abilities = [a.strip() for a in row_data["abilities"].split(",")]
-                    elif isinstance(row_data["abilities"], list):
-                        abilities = row_data["abilities"]
-                
-                if existing:
-                    # Update existing
-                    existing.name = row_data.get("name", existing.name)
-                    existing.age = row_data.get("age") or existing.age
-                    existing.description = row_data.get("description") or existing.description
-                    existing.backstory = row_data.get("backstory") or existing.backstory
-                    existing.hp_max = row_data.get("hp_max") or existing.hp_max
-                    existing.hp_current = row_data.get("hp_current") or existing.hp_current or existing.hp_max
-                    existing.damage_base = row_data.get("damage_base") or existing.damage_base
-                    if stats:
-                        existing.stats = stats
-                    if abilities:
-                        existing.abilities = abilities
-                    result["characters"]["updated"] += 1
-                else:
-                    # Create new
-                    character = Character(
-                        name=row_data["name"],
-                        age=row_data.get("age"),
-                        description=row_data.get("description"),
-                        backstory=row_data.get("backstory"),
-                        hp_max=row_data.get("hp_max", 100),
-                        hp_current=row_data.get("hp_current") or row_data.get("hp_max", 100),
-                        damage_base=row_data.get("damage_base", 1),
-                        stats=stats,
-                        abilities=abilities
-                    )
-                    db.add(character)
-                    result["characters"]["created"] += 1
-            except Exception as e:
-                result["characters"]["errors"].append(f"Row {row_idx}: {str(e)}")
-        
-        await db.commit()
-    
-    # Import mobs
-    if "mobs" in workbook.sheetnames:
-        sheet = workbook["mobs"]
-        headers = [cell.value for cell in sheet[1]]
-        
-        for row_idx, row in enumerate(sheet.iter_rows(min_row=2, values_only=False), start=2):
-            try:
-                row_data = {headers[i]: cell.value for i, cell in enumerate(row) if i < len(headers)}
-                
-                if not row_data.get("name"):
-                    continue
-                
-                mob_id = row_data.get("id")
-                if mob_id:
-                    query = select(Mob).where(Mob.id == mob_id)
-                    existing = (await db.execute(query)).scalar_one_or_none()
-                else:
-                    query = select(Mob).where(Mob.name == row_data["name"])
-                    existing = (await db.execute(query)).scalar_one_or_none()
-                
-                if existing:
-                    existing.name = row_data.get("name", existing.name)
-                    existing.description = row_data.get("description") or existing.description
-                    existing.base_hp = row_data.get("base_hp") or existing.base_hp
-                    existing.base_damage = row_data.get("base_damage") or existing.base_damage
-                    existing.dice_pattern = row_data.get("dice_pattern") or existing.dice_pattern
-                    existing.public_description = row_data.get("public_description") or existing.public_description
-                    existing.gm_notes = row_data.get("gm_notes") or existing.gm_notes
-                    result["mobs"]["updated"] += 1
-                else:
-                    mob = Mob(
-                        name=row_data["name"],
-                        description=row_data.get("description"),
-                        base_hp=row_data.get("base_hp", 50),
-                        base_damage=row_data.get("base_damage", 1),
-                        dice_pattern=row_data.get("dice_pattern"),
-                        public_description=row_data.get("public_description"),
-                        gm_notes=row_data.get("gm_notes")
-                    )
-                    db.add(mob)
-                    result["mobs"]["created"] += 1
-            except Exception as e:
-                result["mobs"]["errors"].append(f"Row {row_idx}: {str(e)}")
-        
-        await db.commit()
-    
-    # Import locations
-    if "locations" in workbook.sheetnames:
-        sheet = workbook["locations"]
-        headers = [cell.value for cell in sheet[1]]
-        
-        for row_idx, row in enumerate(sheet.iter_rows(min_row=2, values_only=False), start=2):
-            try:
-                row_data = {headers[i]: cell.value for i, cell in enumerate(row) if i < len(headers)}
-                
-                if not row_data.get("name"):
-                    continue
-                
-                loc_id = row_data.get("id")
-                if loc_id:
-                    query = select(Location).where(Location.id == loc_id)
-                    existing = (await db.execute(query)).scalar_one_or_none()
-                else:
-                    query = select(Location).where(Location.name == row_data["name"])
-                    existing = (await db.execute(query)).scalar_one_or_none()
-                
-                # Parse tags
-                tags = []
-                if row_data.get("tags"):
-                    if isinstance(row_data["tags"], str):
-                        tags = [t.strip() for t in row_data["tags"].split(",")]
-                    elif isinstance(row_data["tags"], list):
-                        tags = row_data["tags"]
-                
-                if existing:
-                    existing.name = row_data.get("name", existing.name)
-                    existing.description = row_data.get("description") or existing.description
-                    if tags:
-                        existing.tags = tags
-                    result["locations"]["updated"] += 1
-                else:
-                    location = Location(
-                        name=row_data["name"],
-                        description=row_data.get("description"),
-                        tags=tags
-                    )
-                    db.add(location)
-                    result["locations"]["created"] += 1
-            except Exception as e:
-                result["locations"]["errors"].append(f"Row {row_idx}: {str(e)}")
-        
-        await db.commit()
-    
-    # Import items
-    if "items" in workbook.sheetnames:
-        sheet = workbook["items"]
-        headers = [cell.value for cell in sheet[1]]
-        
-        for row_idx, row in enumerate(sheet.iter_rows(min_row=2, values_only=False), start=2):
-            try:
-                row_data = {headers[i]: cell.value for i, cell in enumerate(row) if i < len(headers)}
-                
-                if not row_data.get("name"):
-                    continue
-                
-                item_id = row_data.get("id")
-                if item_id:
-                    query = select(Item).where(Item.id == item_id)
-                    existing = (await db.execute(query)).scalar_one_or_none()
-                else:
-                    query = select(Item).where(Item.name == row_data["name"])
-                    existing = (await db.execute(query)).scalar_one_or_none()
-                
-                # Parse base_stats
-                base_stats = {}
-                if row_data.get("base_stats"):
-                    try:
-                        if isinstance(row_data["base_stats"], str):
-                            base_stats = json.loads(row_data["base_stats"])
-                        else:
-                            base_stats = row_data["base_stats"]
-                    except:
-                        pass
-                
-                if existing:
-                    existing.name = row_data.get("name", existing.name)
-                    existing.short_description = row_data.get("short_description") or existing.short_description
-                    existing.long_description = row_data.get("long_description") or existing.long_description
-                    if base_stats:
-                        existing.base_stats = base_stats
-                    existing.rarity = row_data.get("rarity") or existing.rarity
-                    existing.charges = row_data.get("charges") or existing.charges
-                    existing.cooldown = row_data.get("cooldown") or existing.cooldown
-                    result["items"]["updated"] += 1
-                else:
-                    item = Item(
-                        name=row_data["name"],
-                        short_description=row_data.get("short_description"),
-                        long_description=row_data.get("long_description"),
-                        base_stats=base_stats,
-                        rarity=row_data.get("rarity"),
-                        charges=row_data.get("charges", 0),
-                        cooldown=row_data.get("cooldown", 0)
-                    )
-                    db.add(item)
-                    result["items"]["created"] += 1
-            except Exception as e:
-                result["items"]["errors"].append(f"Row {row_idx}: {str(e)}")
-        
-        await db.commit()
-    
-    # Import note templates
-    if "notes_templates" in workbook.sheetnames:
-        sheet = workbook["notes_templates"]
-        headers = [cell.value for cell in sheet[1]]
-        
-        for row_idx, row in enumerate(sheet.iter_rows(min_row=2, values_only=False), start=2):
-            try:
-                row_data = {headers[i]: cell.value for i, cell in enumerate(row) if i < len(headers)}
-                
-                if not row_data.get("text"):
-                    continue
-                
-                template_id = row_data.get("id")
-                if template_id:
-                    query = select(NoteTemplate).where(NoteTemplate.id == template_id)
-                    existing = (await db.execute(query)).scalar_one_or_none()
-                else:
-                    query = select(NoteTemplate).where(NoteTemplate.text == row_data["text"])
-                    existing = (await db.execute(query)).scalar_one_or_none()
-                
-                if existing:
-                    existing.text = row_data.get("text", existing.text)
-                    existing.visibility = row_data.get("visibility", existing.visibility)
-                    result["notes_templates"]["updated"] += 1
-                else:
-                    template = NoteTemplate(
-                        text=row_data["text"],
-                        visibility=row_data.get("visibility", "decide_yourself")
-                    )
-                    db.add(template)
-                    result["notes_templates"]["created"] += 1
-            except Exception as e:
-                result["notes_templates"]["errors"].append(f"Row {row_idx}: {str(e)}")
-        
-        await db.commit()
-    
+    sheets = {sheet_name: (model, key, build) for sheet_name, model, key, build in SHEETS}
+
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    # Queue slots are counted on the thread side so the parser blocks there
+    slots = threading.BoundedSemaphore(IMPORT_QUEUE_SIZE)
+    stop = threading.Event()
+    parser = loop.run_in_executor(None, parse_workbook, source, loop, queue, slots, stop)
+
+    try:
+        while True:
+            message = await queue.get()
+            slots.release()
+            if message is None:
+                break
+            if isinstance(message, BaseException):
+                raise message
+
+            sheet_name, batch = message
+            if batch is None:
+                # Sheet finished
+                await db.commit()
+                continue
+
+            model, key, build = sheets[sheet_name]
+            await import_sheet(db, batch, model, key, build, result[sheet_name])
+    finally:
+        stop.set()
+        await parser
+
     return result
 
+
+def parse_workbook(
+    source: Union[str, BinaryIO],
+    loop: asyncio.AbstractEventLoop,
+    queue: asyncio.Queue,
+    slots: threading.BoundedSemaphore,
+    stop: threading.Event
+) -> None:
+    """
+    Worker thread: stream sheets as (sheet name, rows) batches into the queue.
+    Each sheet ends with (sheet name, None); the whole workbook with None.
+    Parse errors are forwarded to the writer as the exception itself.
+    """
+    def put(message) -> None:
+        # Wait for a free slot, giving up once the writer has stopped
+        while not slots.acquire(timeout=0.5):
+            if stop.is_set():
+                raise ImportCancelled()
+        if stop.is_set():
+            slots.release()
+            raise ImportCancelled()
+        loop.call_soon_threadsafe(queue.put_nowait, message)
+
+    try:
+        workbook = openpyxl.load_workbook(source, read_only=True, data_only=True)
+        try:
+            for sheet_name, _, _, _ in SHEETS:
+                if sheet_name not in workbook.sheetnames:
+                    continue
+
+                batch: List[Row] = []
+                for row in read_rows(workbook[sheet_name]):
+                    batch.append(row)
+                    if len(batch) >= IMPORT_BATCH_SIZE:
+                        put((sheet_name, batch))
+                        batch = []
+                if batch:
+                    put((sheet_name, batch))
+                put((sheet_name, None))
+        finally:
+            workbook.close()
+    except ImportCancelled:
+        return
+    except Exception as e:
+        try:
+            put(e)
+        except ImportCancelled:
+            pass
+        return
+
+    try:
+        put(None)
+    except ImportCancelled:
+        pass
+
+
+def read_rows(sheet) -> Iterator[Row]:
+    """Yield (row number, {header: value}) for every data row of a sheet"""
+    values = sheet.iter_rows(values_only=True)
+    headers = next(values, None) or ()
+
+    for row_idx, row in enumerate(values, start=2):
+        yield row_idx, {headers[i]: value for i, value in enumerate(row) if i < len(headers)}
+
+
+async def import_sheet(
+    db: AsyncSession,
+    rows: List[Row],
+    model,
+    key: str,
+    build: Callable[[Dict[str, Any], Optional[Record]], Record],
+    counts: Dict[str, Any]
+) -> None:
+    """
+    Import one batch of sheet rows with set-based statements.
+    Existing rows are prefetched by id and by key column in one pass, then
+    all new rows go out as one bulk INSERT and all changes as one bulk UPDATE.
+    A row matches by id if it has one, otherwise by key (name/text); rows
+    written by earlier batches of the same sheet are found by the prefetch.
+    """
+    ids = set()
+    keys = set()
+    for _, row_data in rows:
+        try:
+            row_id = parse_row_id(row_data)
+        except ValueError:
+            continue
+        if isinstance(row_id, int):
+            ids.add(row_id)
+        elif row_data.get(key):
+            keys.add(row_data[key])
+
+    by_id, by_key, ambiguous = await prefetch_records(db, model, key, ids, keys)
+
+    created: List[Record] = []
+    updated: Dict[int, Record] = {}
+    fields = set()
+
+    for row_idx, row_data in rows:
+        try:
+            if not row_data.get(key):
+                continue
+
+            row_id = parse_row_id(row_data)
+            if row_id is not None:
+                existing = by_id.get(row_id)
+            else:
+                if row_data[key] in ambiguous:
+                    raise ValueError(f"Multiple rows found for {key} '{row_data[key]}'")
+                existing = by_key.get(row_data[key])
+
+            values = build(row_data, existing)
+            fields.update(values)
+
+            if existing is not None:
+                old_key = existing.get(key)
+                existing.update(values)
+                if by_key.get(old_key) is existing and existing[key] != old_key:
+                    del by_key[old_key]
+                by_key[existing[key]] = existing
+                # Rows created earlier in this sheet are still pending inserts
+                if "id" in existing:
+                    updated[existing["id"]] = existing
+                counts["updated"] += 1
+            else:
+                created.append(values)
+                by_key[values[key]] = values
+                counts["created"] += 1
+        except Exception as e:
+            counts["errors"].append(f"Row {row_idx}: {str(e)}")
+
+    # Versioned rows (Character) start at 1 and every update bumps the version,
+    # so clients holding an expected_version see the import as a conflict
+    table = model.__table__
+    versioned = "version" in table.c
+
+    if created:
+        if versioned:
+            created = [{**values, "version": 1} for values in created]
+        await db.execute(insert(model), created)
+
+    if updated:
+        params = [{"id": record["id"], **{field: record[field] for field in fields}} for record in updated.values()]
+        if versioned:
+            statement = (
+                update(table)
+                .where(table.c.id == bindparam("record_id"))
+                .values(version=table.c.version + 1, **{field: bindparam(f"new_{field}") for field in fields})
+            )
+            params = [
+                {"record_id": param["id"], **{f"new_{field}": param[field] for field in fields}}
+                for param in params
+            ]
+            await db.execute(statement, params)
+        else:
+            await db.execute(update(model), params)
+
+
+async def prefetch_records(
+    db: AsyncSession,
+    model,
+    key: str,
+    ids: set,
+    keys: set
+) -> Tuple[Dict[int, Record], Dict[Any, Record], set]:
+    """Load existing rows matching the given ids or keys as plain dicts"""
+    table = model.__table__
+    key_column = table.c[key]
+
+    by_id: Dict[int, Record] = {}
+    ids = list(ids)
+    keys = list(keys)
+    for start in range(0, max(len(ids), len(keys)), PREFETCH_CHUNK_SIZE):
+        chunk_ids = ids[start:start + PREFETCH_CHUNK_SIZE]
+        chunk_keys = keys[start:start + PREFETCH_CHUNK_SIZE]
+        result = await db.execute(
+            select(table).where(or_(table.c.id.in_(chunk_ids), key_column.in_(chunk_keys)))
+        )
+        for row in result.mappings():
+            by_id[row["id"]] = dict(row)
+
+    by_key: Dict[Any, Record] = {}
+    ambiguous = set()
+    for record in sorted(by_id.values(), key=lambda r: r["id"]):
+        if record[key] in by_key:
+            ambiguous.add(record[key])
+        by_key.setdefault(record[key], record)
+
+    return by_id, by_key, ambiguous
+
+
+def parse_row_id(row_data: Dict[str, Any]) -> Optional[Union[int, float]]:
+    row_id = row_data.get("id")
+    if not row_id:
+        return None
+    # A fractional id matches no row, so the row is created (as before the bulk import)
+    if isinstance(row_id, float) and not row_id.is_integer():
+        return row_id
+    return int(row_id)
+
+
+def build_character(row_data: Dict[str, Any], existing: Optional[Record]) -> Record:
+    # Parse stats
+    stats = {}
+    if row_data.get("stats"):
+        try:
+            if isinstance(row_data["stats"], str):
+                stats = json.loads(row_data["stats"])
+            else:
+                stats = row_data["stats"]
+        except:
+            # Try parsing individual columns
+            for key in ["str", "dex", "int", "con", "wis", "cha"]:
+                if key in row_data and row_data[key] is not None:
+                    stats[key] = int(row_data[key])
+
+    # Parse abilities
+    abilities = []
+    if row_data.get("abilities"):
+        if isinstance(row_data["abilities"], str):
+            abilities = [a.strip() for a in row_data["abilities"].split(",")]
+        elif isinstance(row_data["abilities"], list):
+            abilities = row_data["abilities"]
+
+    if existing:
+        hp_max = row_data.get("hp_max") or existing["hp_max"]
+        name = row_data.get("name", existing["name"])
+        return {
+            "name": name,
+            "name_key": normalize_name(name),
+            "age": row_data.get("age") or existing["age"],
+            "description": row_data.get("description") or existing["description"],
+            "backstory": row_data.get("backstory") or existing["backstory"],
+            "hp_max": hp_max,
+            "hp_current": row_data.get("hp_current") or existing["hp_current"] or hp_max,
+            "damage_base": row_data.get("damage_base") or existing["damage_base"],
+            "stats": stats or existing["stats"],
+            "abilities": abilities or existing["abilities"]
+        }
+
+    return {
+        "name": row_data["name"],
+        "name_key": normalize_name(row_data["name"]),
+        "age": row_data.get("age"),
+        "description": row_data.get("description"),
+        "backstory": row_data.get("backstory"),
+        "hp_max": row_data.get("hp_max", 100),
+        "hp_current": row_data.get("hp_current") or row_data.get("hp_max", 100),
+        "damage_base": row_data.get("damage_base", 1),
+        "stats": stats,
+        "abilities": abilities
+    }
+
+
+def build_mob(row_data: Dict[str, Any], existing: Optional[Record]) -> Record:
+    if existing:
+        return {
+            "name": row_data.get("name", existing["name"]),
+            "description": row_data.get("description") or existing["description"],
+            "base_hp": row_data.get("base_hp") or existing["base_hp"],
+            "base_damage": row_data.get("base_damage") or existing["base_damage"],
+            "dice_pattern": row_data.get("dice_pattern") or existing["dice_pattern"],
+            "public_description": row_data.get("public_description") or existing["public_description"],
+            "gm_notes": row_data.get("gm_notes") or existing["gm_notes"]
+        }
+
+    return {
+        "name": row_data["name"],
+        "description": row_data.get("description"),
+        "base_hp": row_data.get("base_hp", 50),
+        "base_damage": row_data.get("base_damage", 1),
+        "dice_pattern": row_data.get("dice_pattern"),
+        "public_description": row_data.get("public_description"),
+        "gm_notes": row_data.get("gm_notes")
+    }
+
+
+def build_location(row_data: Dict[str, Any], existing: Optional[Record]) -> Record:
+    # Parse tags
+    tags = []
+    if row_data.get("tags"):
+        if isinstance(row_data["tags"], str):
+            tags = [t.strip() for t in row_data["tags"].split(",")]
+        elif isinstance(row_data["tags"], list):
+            tags = row_data["tags"]
+
+    if existing:
+        return {
+            "name": row_data.get("name", existing["name"]),
+            "description": row_data.get("description") or existing["description"],
+            "tags": tags or existing["tags"]
+        }
+
+    return {
+        "name": row_data["name"],
+        "description": row_data.get("description"),
+        "tags": tags
+    }
+
+
+def build_item(row_data: Dict[str, Any], existing: Optional[Record]) -> Record:
+    # Parse base_stats
+    base_stats = {}
+    if row_data.get("base_stats"):
+        try:
+            if isinstance(row_data["base_stats"], str):
+                base_stats = json.loads(row_data["base_stats"])
+            else:
+                base_stats = row_data["base_stats"]
+        except:
+            pass
+
+    if existing:
+        return {
+            "name": row_data.get("name", existing["name"]),
+            "short_description": row_data.get("short_description") or existing["short_description"],
+            "long_description": row_data.get("long_description") or existing["long_description"],
+            "base_stats": base_stats or existing["base_stats"],
+            "rarity": row_data.get("rarity") or existing["rarity"],
+            "charges": row_data.get("charges") or existing["charges"],
+            "cooldown": row_data.get("cooldown") or existing["cooldown"]
+        }
+
+    return {
+        "name": row_data["name"],
+        "short_description": row_data.get("short_description"),
+        "long_description": row_data.get("long_description"),
+        "base_stats": base_stats,
+        "rarity": row_data.get("rarity"),
+        "charges": row_data.get("charges", 0),
+        "cooldown": row_data.get("cooldown", 0)
+    }
+
+
+def build_note_template(row_data: Dict[str, Any], existing: Optional[Record]) -> Record:
+    if existing:
+        return {
+            "text": row_data.get("text", existing["text"]),
+            "visibility": row_data.get("visibility", existing["visibility"])
+        }
+
+    return {
+        "text": row_data["text"],
+        "visibility": row_data.get("visibility", "decide_yourself")
+    }
+
+
+# (sheet name, model, lookup column, row builder), in import order
+SHEETS = [
+    ("characters", Character, "name", build_character),
+    ("mobs", Mob, "name", build_mob),
+    ("locations", Location, "name", build_location),
+    ("items", Item, "name", build_item),
+    ("notes_templates", NoteTemplate, "text", build_note_template),
+]
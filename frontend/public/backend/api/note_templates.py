@@ -0,0 +1,48 @@
+import asyncio
+import time
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database import NoteTemplate
+
+NOTE_TEMPLATE_CACHE_TTL = 300.0
+
+
+class NoteTemplateCache:
+    """
+    template id -> (text, visibility). Templates are few and change only on
+    Excel import, so the whole table is loaded in one query and kept for
+    ttl seconds or until clear(); concurrent misses share that query.
+    Ids not in the cache are looked up directly and never cached as
+    missing, so a template added meanwhile is usable straight away.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._templates: Dict[int, Tuple[str, Optional[str]]] = {}
+        self._expires = 0.0
+        self._lock = asyncio.Lock()
+
+    async def get(self, template_id: int, db: AsyncSession) -> Optional[Tuple[str, Optional[str]]]:
+        if time.monotonic() >= self._expires:
+            async with self._lock:
+                if time.monotonic() >= self._expires:
+                    result = await db.execute(select(NoteTemplate.id, NoteTemplate.text, NoteTemplate.visibility))
+                    self._templates = {row.id: (row.text, row.visibility) for row in result.all()}
+                    self._expires = time.monotonic() + self.ttl
+        template = self._templates.get(template_id)
+        if template is None:
+            row = (await db.execute(
+                select(NoteTemplate.text, NoteTemplate.visibility).where(NoteTemplate.id == template_id)
+            )).first()
+            if row is not None:
+                template = self._templates[template_id] = (row.text, row.visibility)
+        return template
+
+    def clear(self) -> None:
+        self._expires = 0.0
+
+
+note_template_cache = NoteTemplateCache(NOTE_TEMPLATE_CACHE_TTL)
@@ -0,0 +1,36 @@
+import base64
+import json
+from datetime import datetime
+from typing import Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import tuple_
+
+# Keyset pages are ordered by (created_at DESC, id DESC); a cursor is the
+# position of the last row of the previous page
+
+Cursor = Tuple[datetime, int]
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    raw = json.dumps([created_at.isoformat(), row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[Cursor]:
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, row_id = json.loads(raw)
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def keyset_page(query, model, cursor: Optional[Cursor], limit: int):
+    """Apply cursor, order and limit; one extra row tells if a next page exists"""
+    if cursor:
+        query = query.where(tuple_(model.created_at, model.id) < tuple_(*cursor))
+    return query.order_by(model.created_at.desc(), model.id.desc()).limit(limit + 1)
+
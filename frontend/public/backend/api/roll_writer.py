@@ -0,0 +1,137 @@
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from database import async_session_maker
+
+logger = logging.getLogger(__name__)
+
+FLUSH_ATTEMPTS = 3
+
+
+class DiceRollWriter:
+    """
+    Write-behind log for dice rolls.
+    Rolls are queued in memory and written by a background task in batches
+    of up to batch_size, at least every flush_interval seconds. stop()
+    flushes everything still queued.
+    """
+
+    def __init__(self, save: Callable[..., Awaitable[None]], queue_size: int, batch_size: int, flush_interval: float):
+        self.save = save
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self._stop = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self.flushed_total = 0
+        self.failed_total = 0
+        self.last_flush_lag = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        self._stop.clear()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._stop.set()
+        await self._task
+        self._task = None
+
+    def submit(self, rolls: List[Any]) -> bool:
+        """Queue rolls; False if the writer is not running or has no room"""
+        if not self.running or self._stop.is_set() or self.queue.maxsize - self.queue.qsize() < len(rolls):
+            return False
+        now = time.monotonic()
+        for roll in rolls:
+            self.queue.put_nowait((now, roll))
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self.running,
+            "queue_depth": self.queue.qsize(),
+            "queue_size": self.queue.maxsize,
+            "flushed_total": self.flushed_total,
+            "failed_total": self.failed_total,
+            "last_flush_lag_seconds": round(self.last_flush_lag, 4)
+        }
+
+    async def _run(self) -> None:
+        while not (self._stop.is_set() and self.queue.empty()):
+            batch = await self._collect()
+            if batch:
+                await self._flush(batch)
+
+    async def _collect(self) -> List[Any]:
+        loop = asyncio.get_running_loop()
+        batch = []
+        deadline = loop.time() + self.flush_interval
+
+        while len(batch) < self.batch_size:
+            # Draining on shutdown: take what is queued without waiting
+            if self._stop.is_set():
+                if self.queue.empty():
+                    break
+                batch.append(self.queue.get_nowait())
+                continue
+
+            if not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+                continue
+
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            roll = await self._wait_for_roll(timeout)
+            if roll is not None:
+                batch.append(roll)
+
+        return batch
+
+    async def _wait_for_roll(self, timeout: float) -> Optional[Any]:
+        """Next queued roll, or None on timeout or when stop() is called meanwhile"""
+        get = asyncio.ensure_future(self.queue.get())
+        stopped = asyncio.ensure_future(self._stop.wait())
+        try:
+            await asyncio.wait((get, stopped), timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            stopped.cancel()
+            if not get.done():
+                get.cancel()
+        return get.result() if get.done() and not get.cancelled() else None
+
+    async def _flush(self, batch: List[Any]) -> None:
+        rolls = [roll for _, roll in batch]
+        for attempt in range(1, FLUSH_ATTEMPTS + 1):
+            try:
+                async with async_session_maker() as db:
+                    await self.save(db, rolls)
+                self.flushed_total += len(rolls)
+                break
+            except Exception as e:
+                if attempt == FLUSH_ATTEMPTS:
+                    logger.error(f"Failed to write {len(rolls)} dice rolls as a batch, writing one by one: {e}")
+                    await self._flush_each(rolls)
+                    break
+                logger.warning(f"Dice roll flush failed (attempt {attempt}/{FLUSH_ATTEMPTS}): {e}")
+                await asyncio.sleep(0.1 * 2 ** attempt)
+
+        self.last_flush_lag = time.monotonic() - batch[0][0]
+
+    async def _flush_each(self, rolls: List[Any]) -> None:
+        """Fallback for a failing batch: a bad roll only loses itself"""
+        for roll in rolls:
+            try:
+                async with async_session_maker() as db:
+                    await self.save(db, [roll])
+                self.flushed_total += 1
+            except Exception as e:
+                self.failed_total += 1
+                logger.error(f"Failed to write dice roll {roll!r}: {e}")
@@ -1,26 +1,45 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, UploadFile, File
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_
-from typing import Optional, List, Dict, Any
+from sqlalchemy import select, insert, update, func
+from sqlalchemy.exc import DBAPIError, IntegrityError
+from sqlalchemy.orm import joinedload, selectinload, undefer, undefer_group
+from typing import Optional, List, Dict, Any, Tuple
 from datetime import datetime
-import random
-import re
+import os
 
-from database import get_db, User, Character, UserCharacter, Location, Mob, MobInstance, Item, CharacterItem, Note, NoteTemplate, DiceRoll, LocationMob
-from api.auth import authenticate_player, authenticate_master
+from database import get_db, async_session_maker, dialect_insert, normalize_name, User, Character, UserCharacter, Location, Mob, MobInstance, Item, CharacterItem, Note, NoteTemplate, DiceRoll, LocationMob
+from config import (
+    EXCEL_IMPORT_MAX_BYTES, DICE_WRITE_BEHIND_QUEUE_SIZE,
+    DICE_WRITE_BEHIND_BATCH_SIZE, DICE_WRITE_BEHIND_FLUSH_INTERVAL
+)
+from api.auth import authenticate_player, authenticate_master, character_name_cache
 from api.excel_import import import_excel_data
+from api import dice
+from api.events import dice_hub, note_hub, stream_events
+from api.cache import catalog_cache
+from api.roll_writer import DiceRollWriter
+from api.pagination import Cursor, decode_cursor, encode_cursor, keyset_page
+from api.responses import FastJSONResponse, row_dicts
+from api.sheet_patch import sheet_patch_steps
+from api.note_templates import note_template_cache
 from api.schemas import (
-    DiceRollRequest, NoteCreateRequest, LocationCreateRequest,
-    MoveCharacterRequest, SpawnMobRequest, GiveItemRequest,
-    AssignCharacterRequest, CharacterUpdateRequest,
-    AuthPlayerRequest, AuthMasterRequest
+    DiceRollRequest, DiceRollBatchRequest, NoteCreateRequest, BroadcastNoteRequest, LocationCreateRequest,
+    MoveCharacterRequest, MoveCharactersRequest, SpawnMobRequest, GiveItemRequest, GiveItemsRequest,
+    AssignCharacterRequest, CharacterUpdateRequest, CharacterSheetPatchRequest,
+    AuthPlayerRequest, AuthMasterRequest,
+    MessageResponse, PlayerAuthResponse, MasterAuthResponse, CharacterResponse, DiceRollResult,
+    DiceRollEntry, DiceWriterStats, NoteEntry, DashboardResponse, CharacterSummary, CreatedNote, BroadcastNoteResponse,
+    LocationSummary, LocationEntry, MobEntry, SpawnedMob, ItemEntry, GiveItemResponse, GiveItemsResponse,
+    MoveCharactersResponse,
+    CharacterUpdateResponse, SheetPatchResponse, ImportResponse
 )
 
 router = APIRouter()
 
 
 # Authentication endpoints
-@router.post("/auth/player")
+@router.post("/auth/player", response_model=PlayerAuthResponse)
 async def auth_player(
     character_name: str,
     db: AsyncSession = Depends(get_db)
@@ -29,94 +48,42 @@ async def auth_player(
     return await authenticate_player(character_name, db)
 
 
-@router.post("/auth/master")
+@router.post("/auth/master", response_model=MasterAuthResponse)
 async def auth_master(password: str):
     """Аутентификация мастера по паролю"""
     return await authenticate_master(password)
 
 
-@router.get("/character/{character_id}")
+@router.get("/character/{character_id}", response_model=CharacterResponse)
 async def get_character(
     character_id: int,
     db: AsyncSession = Depends(get_db)
 ):
     """Get character details"""
-    result = await db.execute(select(Character).where(Character.id == character_id))
-    character = result.scalar_one_or_none()
-    if not character:
-        raise HTTPException(status_code=404, detail="Character not found")
-    
-    # Get inventory
-    result = await db.execute(
-        select(Item, CharacterItem)
-        .join(CharacterItem, Item.id == CharacterItem.item_id)
-        .where(CharacterItem.character_id == character_id)
-    )
-    inventory_items = result.all()
-    
-    # Get notes
+    # Character, location and inventory in one joined query; notes (a second
+    # collection) in one selectin query to avoid an inventory x notes product
     result = await db.execute(
-        select(Note).where(Note.character_id == character_id).order_by(Note.created_at.desc())
+        select(Character)
+        .where(Character.id == character_id)
+        .options(
+            undefer_group("details"),
+            joinedload(Character.location),
+            joinedload(Character.inventory).joinedload(CharacterItem.item).undefer_group("details"),
+            selectinload(Character.notes)
+        )
     )
-    notes = result.scalars().all()
-    
-    # Get location
-    location = None
-    if character.location_id:
-        result = await db.execute(select(Location).where(Location.id == character.location_id))
-        location = result.scalar_one_or_none()
+    character = result.unique().scalar_one_or_none()
+    if not character:
+        raise HTTPException(status_code=404, detail="Character not found")
     
     return {
-        "character": {
-            "id": character.id,
-            "name": character.name,
-            "age": character.age,
-            "description": character.description,
-            "backstory": character.backstory,
-            "hp_current": character.hp_current,
-            "hp_max": character.hp_max,
-            "damage_base": character.damage_base,
-            "stats": character.stats or {},
-            "abilities": character.abilities or [],
-            "notes_visible_to_player": character.notes_visible_to_player or [],
-            "location_id": character.location_id,
-            "location": {
-                "id": location.id,
-                "name": location.name,
-                "description": location.description,
-                "tags": location.tags or []
-            } if location else None
-        },
-        "inventory": [
-            {
-                "id": item.id,
-                "name": item.name,
-                "short_description": item.short_description,
-                "long_description": item.long_description,
-                "base_stats": item.base_stats or {},
-                "rarity": item.rarity,
-                "charges": item.charges,
-                "cooldown": item.cooldown,
-                "quantity": char_item.quantity,
-                "state": char_item.state,
-                "cooldown_until": char_item.cooldown_until.isoformat() if char_item.cooldown_until else None
-            }
-            for item, char_item in inventory_items
-        ],
-        "notes": [
-            {
-                "id": note.id,
-                "text": note.text,
-                "visibility": note.visibility,
-                "from_gm": note.from_gm,
-                "created_at": note.created_at.isoformat()
-            }
-            for note in notes
-        ]
+        "character": character,
+        "inventory": character.inventory,
+        "notes": character.notes
     }
 
 
-@router.post("/dice/roll")
+@router.post("/dice/roll", response_model=DiceRollResult)
 async def roll_dice(
     request: DiceRollRequest,
     character_id: Optional[int] = None,
@@ -126,35 +93,10 @@ async def roll_dice(
     # Parse dice type and roll
     dice_value = parse_and_roll_dice(request.dice_type)
     
-    # Save roll if character_id provided
-    if request.character_id:
-        result = await db.execute(select(Character).where(Character.id == request.character_id))
-        character = result.scalar_one_or_none()
-        if character:
-            # Find or create user for character
-            result = await db.execute(
-                select(UserCharacter).where(UserCharacter.character_id == request.character_id)
-            )
-            uc = result.scalar_one_or_none()
-            user_id = uc.user_id if uc else None
-            
-            if not user_id:
-                # Create dummy user
-                user = User(telegram_id=0, role="player", name=character.name)
-                db.add(user)
-                await db.commit()
-                await db.refresh(user)
-                user_id = user.id
-            
-            dice_roll = DiceRoll(
-                user_id=user_id,
-                character_id=request.character_id,
-                type=request.dice_type,
-                value=dice_value,
-                context=request.context or {}
-            )
-            db.add(dice_roll)
-            await db.commit()
+    rolls = [(request, dice_value, datetime.utcnow())]
+    # Write-behind mode answers right away; fall back to a direct write when it is off or full
+    if not (request.character_id and dice_writer.submit(rolls)):
+        await save_dice_rolls(db, rolls)
     
     return {
         "type": request.dice_type,
@@ -162,156 +104,317 @@ async def roll_dice(
     }
 
 
-def parse_and_roll_dice(dice_pattern: str) -> int:
-    """Parse dice pattern like '2d6+1' or 'd20' and roll"""
-    # Simple patterns: d4, d6, d8, d10, d12, d20, d100
-    simple_match = re.match(r'^d(\d+)$', dice_pattern.lower())
-    if simple_match:
-        sides = int(simple_match.group(1))
-        return random.randint(1, sides)
-    
-    # Complex patterns: 2d6+1, 3d8-2, etc.
-    complex_match = re.match(r'^(\d+)d(\d+)([+-]\d+)?$', dice_pattern.lower())
-    if complex_match:
-        count = int(complex_match.group(1))
-        sides = int(complex_match.group(2))
-        modifier = int(complex_match.group(3)) if complex_match.group(3) else 0
-        
-        total = sum(random.randint(1, sides) for _ in range(count))
-        return total + modifier
+@router.post("/dice/roll/batch", response_model=List[DiceRollResult])
+async def roll_dice_batch(
+    request: DiceRollBatchRequest,
+    db: AsyncSession = Depends(get_db)
+):
+    """Roll many dice in one request; results are in input order"""
+    try:
+        values = dice.roll_many([roll.dice_type for roll in request.rolls])
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
-    # Custom range: e.g., "1-100"
-    range_match = re.match(r'^(\d+)-(\d+)$', dice_pattern)
-    if range_match:
-        min_val = int(range_match.group(1))
-        max_val = int(range_match.group(2))
-        return random.randint(min_val, max_val)
+    rolled_at = datetime.utcnow()
+    rolls = [(roll, value, rolled_at) for roll, value in zip(request.rolls, values)]
+    if not dice_writer.submit(rolls):
+        await save_dice_rolls(db, rolls)
     
-    # Default: try to parse as single number
+    return [
+        {"type": roll.dice_type, "value": value}
+        for roll, value in zip(request.rolls, values)
+    ]
+
+
+async def save_dice_rolls(db: AsyncSession, rolls: List[Tuple[DiceRollRequest, int, datetime]]) -> None:
+    """
+    Persist rolls that have an existing character in one transaction.
+    Characters and their user links are resolved in one query; rolls (and
+    placeholder users for unlinked characters) are flushed as bulk INSERTs.
+    """
     try:
-        return int(dice_pattern)
-    except:
+        await _save_dice_rolls(db, rolls)
+    except IntegrityError:
+        # A concurrent request created the same placeholder user; it is linked now
+        await db.rollback()
+        await _save_dice_rolls(db, rolls)
+
+
+async def _save_dice_rolls(db: AsyncSession, rolls: List[Tuple[DiceRollRequest, int, datetime]]) -> None:
+    character_ids = {request.character_id for request, _, _ in rolls if request.character_id}
+    if not character_ids:
+        return
+    
+    result = await db.execute(
+        select(Character.id, Character.name, func.min(UserCharacter.user_id))
+        .outerjoin(UserCharacter, UserCharacter.character_id == Character.id)
+        .where(Character.id.in_(character_ids))
+        .group_by(Character.id, Character.name)
+    )
+    characters = {char_id: [name, user_id] for char_id, name, user_id in result.all()}
+    if not characters:
+        return
+    
+    # Create and link a placeholder user for characters without one
+    # (telegram_id is unique, so it is derived from the character id)
+    dummy_users = {
+        char_id: User(telegram_id=-char_id, role="player", name=name)
+        for char_id, (name, user_id) in characters.items()
+        if user_id is None
+    }
+    if dummy_users:
+        db.add_all(dummy_users.values())
+        await db.flush()
+        db.add_all(
+            UserCharacter(user_id=user.id, character_id=char_id)
+            for char_id, user in dummy_users.items()
+        )
+        for char_id, user in dummy_users.items():
+            characters[char_id][1] = user.id
+    
+    dice_rolls = [
+        DiceRoll(
+            user_id=characters[request.character_id][1],
+            character_id=request.character_id,
+            type=request.dice_type,
+            value=value,
+            context=request.context or {},
+            created_at=rolled_at
+        )
+        for request, value, rolled_at in rolls
+        if request.character_id in characters
+    ]
+    db.add_all(dice_rolls)
+    await db.commit()
+    
+    # Push the new rolls to live feed subscribers
+    for dice_roll in dice_rolls:
+        dice_hub.publish(serialize_dice_roll(dice_roll, characters[dice_roll.character_id][0]))
+
+
+# Optional write-behind log for dice rolls, started in main.lifespan
+dice_writer = DiceRollWriter(
+    save_dice_rolls,
+    queue_size=DICE_WRITE_BEHIND_QUEUE_SIZE,
+    batch_size=DICE_WRITE_BEHIND_BATCH_SIZE,
+    flush_interval=DICE_WRITE_BEHIND_FLUSH_INTERVAL
+)
+
+
+@router.get("/dice/write-behind", response_model=DiceWriterStats)
+async def get_dice_writer_stats():
+    """Write-behind queue depth and flush lag"""
+    return dice_writer.stats()
+
+
+def parse_and_roll_dice(dice_pattern: str) -> int:
+    """Parse dice pattern like '2d6+1', 'd20' or '4d6kh3' and roll"""
+    try:
+        return dice.roll(dice_pattern)
+    except ValueError:
         raise HTTPException(status_code=400, detail=f"Invalid dice pattern: {dice_pattern}")
 
 
-@router.get("/dice/rolls")
-async def get_dice_rolls(
-    character_id: Optional[int] = None,
-    limit: int = 50,
-    db: AsyncSession = Depends(get_db)
-):
-    """Get dice roll history"""
-    query = select(DiceRoll, Character).outerjoin(Character)
+def serialize_dice_roll(roll: DiceRoll, character_name: Optional[str]) -> Dict[str, Any]:
+    """Dice roll as returned by /dice/rolls and the live feed"""
+    return {
+        "id": roll.id,
+        "character_id": roll.character_id,
+        "character_name": character_name or "Неизвестно",
+        "type": roll.type,
+        "value": roll.value,
+        "context": roll.context or {},
+        "created_at": roll.created_at.isoformat()
+    }
+
+
+async def load_dice_rolls(
+    db: AsyncSession,
+    character_id: Optional[int],
+    limit: int,
+    cursor: Optional[Cursor] = None
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """One page of rolls (shaped like DiceRollEntry), newest first, and the cursor of the next page"""
+    query = select(
+        DiceRoll.id,
+        DiceRoll.character_id,
+        func.coalesce(Character.name, "Неизвестно").label("character_name"),
+        DiceRoll.type,
+        DiceRoll.value,
+        DiceRoll.context,
+        DiceRoll.created_at
+    ).outerjoin(Character, Character.id == DiceRoll.character_id)
     
     if character_id:
         query = query.where(DiceRoll.character_id == character_id)
     
-    query = query.order_by(DiceRoll.created_at.desc()).limit(limit)
+    result = await db.execute(keyset_page(query, DiceRoll, cursor, limit))
+    rows = result.all()
     
-    result = await db.execute(query)
-    rolls = result.all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id)
     
-    return [
-        {
-            "id": roll.id,
-            "character_name": char.name if char else "Неизвестно",
-            "type": roll.type,
-            "value": roll.value,
-            "context": roll.context or {},
-            "created_at": roll.created_at.isoformat()
-        }
-        for roll, char in rolls
-    ]
+    return row_dicts(rows, context=dict), next_cursor
 
 
-@router.get("/notes")
-async def get_notes(
+@router.get("/dice/rolls", response_model=List[DiceRollEntry])
+async def get_dice_rolls(
     character_id: Optional[int] = None,
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = None,
     db: AsyncSession = Depends(get_db)
 ):
-    """Get notes for character"""
-    query = select(Note)
+    """Get dice roll history (next page cursor in X-Next-Cursor)"""
+    rolls, next_cursor = await load_dice_rolls(db, character_id, limit, decode_cursor(cursor))
+    return FastJSONResponse(rolls, headers={"X-Next-Cursor": next_cursor} if next_cursor else None)
+
+
+@router.get("/dice/stream")
+async def stream_dice_rolls(
+    character_id: Optional[int] = None,
+    limit: int = Query(50, ge=1, le=500)
+):
+    """Live dice feed (Server-Sent Events): snapshot first, then new rolls"""
+    # Subscribe before reading the snapshot so no roll falls in between
+    subscription = dice_hub.subscribe(character_id)
+    try:
+        # Short-lived session: the stream must not hold a pooled connection
+        async with async_session_maker() as db:
+            snapshot, _ = await load_dice_rolls(db, character_id, limit)
+    except Exception:
+        dice_hub.unsubscribe(subscription)
+        raise
+    
+    return StreamingResponse(
+        stream_events(subscription, dice_hub, snapshot),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+async def load_notes(
+    db: AsyncSession,
+    character_id: Optional[int],
+    limit: int,
+    cursor: Optional[Cursor] = None
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """One page of notes (shaped like NoteEntry), newest first, and the cursor of the next page"""
+    query = select(Note.id, Note.character_id, Note.text, Note.visibility, Note.from_gm, Note.created_at)
     if character_id:
         query = query.where(Note.character_id == character_id)
     
-    query = query.order_by(Note.created_at.desc())
-    result = await db.execute(query)
-    notes = result.scalars().all()
+    result = await db.execute(keyset_page(query, Note, cursor, limit))
+    notes = result.all()
     
-    return [
-        {
-            "id": note.id,
-            "character_id": note.character_id,
-            "text": note.text,
-            "visibility": note.visibility,
-            "from_gm": note.from_gm,
-            "created_at": note.created_at.isoformat()
-        }
-        for note in notes
-    ]
+    next_cursor = None
+    if len(notes) > limit:
+        notes = notes[:limit]
+        next_cursor = encode_cursor(notes[-1].created_at, notes[-1].id)
+    
+    return row_dicts(notes), next_cursor
+
+
+@router.get("/notes", response_model=List[NoteEntry])
+async def get_notes(
+    character_id: Optional[int] = None,
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_db)
+):
+    """Get notes for character (next page cursor in X-Next-Cursor)"""
+    notes, next_cursor = await load_notes(db, character_id, limit, decode_cursor(cursor))
+    return FastJSONResponse(notes, headers={"X-Next-Cursor": next_cursor} if next_cursor else None)
+
+
+@router.get("/notes/stream")
+async def stream_notes(
+    character_id: Optional[int] = None,
+    limit: int = Query(50, ge=1, le=500)
+):
+    """Live notes (Server-Sent Events): snapshot first, then new notes"""
+    subscription = note_hub.subscribe(character_id)
+    try:
+        async with async_session_maker() as db:
+            snapshot, _ = await load_notes(db, character_id, limit)
+    except Exception:
+        note_hub.unsubscribe(subscription)
+        raise
+    
+    return StreamingResponse(
+        stream_events(subscription, note_hub, snapshot, event_name="note"),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 
 # Master-only routes
-@router.get("/master/dashboard")
+@router.get("/master/dashboard", response_model=DashboardResponse)
 async def get_master_dashboard(
     db: AsyncSession = Depends(get_db)
 ):
     """Get master dashboard data"""
-    # Get all characters
-    result = await db.execute(select(Character))
-    characters = result.scalars().all()
+    # Latest roll id per character; resolved by an index seek on
+    # dice_rolls(character_id, created_at, id) for every character
+    latest_roll_id = (
+        select(DiceRoll.id)
+        .where(DiceRoll.character_id == Character.id)
+        .order_by(DiceRoll.created_at.desc(), DiceRoll.id.desc())
+        .limit(1)
+        .correlate(Character)
+        .scalar_subquery()
+    )
     
-    # Get last dice rolls
     result = await db.execute(
-        select(DiceRoll, Character)
-        .outerjoin(Character)
-        .order_by(DiceRoll.created_at.desc())
-        .limit(10)
+        select(
+            Character.id,
+            Character.name,
+            Character.hp_current,
+            Character.hp_max,
+            Character.location_id,
+            Character.version,
+            DiceRoll.type,
+            DiceRoll.value,
+            DiceRoll.created_at
+        )
+        .outerjoin(DiceRoll, DiceRoll.id == latest_roll_id)
+        .order_by(Character.id)
     )
-    recent_rolls = result.all()
-    
-    characters_data = []
-    for char in characters:
-        # Get last roll for this character
-        last_roll = None
-        for roll, roll_char in recent_rolls:
-            if roll_char and roll_char.id == char.id:
-                last_roll = {"type": roll.type, "value": roll.value, "created_at": roll.created_at.isoformat()}
-                break
-        
-        characters_data.append({
-            "id": char.id,
-            "name": char.name,
-            "hp_current": char.hp_current,
-            "hp_max": char.hp_max,
-            "location_id": char.location_id,
-            "last_roll": last_roll
-        })
     
-    return {"characters": characters_data}
+    # Nested last_roll, so rows are shaped here; datetimes are left to orjson
+    characters_data = [
+        {
+            "id": row.id,
+            "name": row.name,
+            "hp_current": row.hp_current,
+            "hp_max": row.hp_max,
+            "location_id": row.location_id,
+            "version": row.version,
+            "last_roll": {
+                "type": row.type,
+                "value": row.value,
+                "created_at": row.created_at
+            } if row.type is not None else None
+        }
+        for row in result.all()
+    ]
+    
+    return FastJSONResponse({"characters": characters_data})
 
 
-@router.get("/master/characters")
+@router.get("/master/characters", response_model=List[CharacterSummary])
 async def get_all_characters(
     db: AsyncSession = Depends(get_db)
 ):
     """Get all characters (master only)"""
-    result = await db.execute(select(Character))
-    characters = result.scalars().all()
-    
-    return [
-        {
-            "id": char.id,
-            "name": char.name,
-            "hp_current": char.hp_current,
-            "hp_max": char.hp_max,
-            "location_id": char.location_id
-        }
-        for char in characters
-    ]
+    result = await db.execute(
+        select(Character.id, Character.name, Character.hp_current, Character.hp_max, Character.location_id)
+    )
+    return FastJSONResponse(row_dicts(result.all()))
 
 
-@router.post("/master/notes")
+@router.post("/master/notes", response_model=CreatedNote)
 async def create_note(
     request: NoteCreateRequest,
     db: AsyncSession = Depends(get_db)
@@ -326,17 +429,62 @@ async def create_note(
     db.add(note)
     await db.commit()
     await db.refresh(note)
+    note_hub.publish(NoteEntry.model_validate(note).model_dump())
     
-    return {
-        "id": note.id,
-        "character_id": note.character_id,
-        "text": note.text,
-        "visibility": note.visibility,
-        "created_at": note.created_at.isoformat()
-    }
+    return note
+
+
+@router.post("/master/notes/broadcast", response_model=BroadcastNoteResponse)
+async def broadcast_note(
+    request: BroadcastNoteRequest,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Send one note to many characters (master only): all characters, the
+    occupants of a location or a list of ids. All notes are written by one
+    bulk INSERT and pushed to /notes/stream subscribers.
+    """
+    text, visibility = request.text, request.visibility
+    if request.template_id is not None:
+        template = await note_template_cache.get(request.template_id, db)
+        if template is None:
+            raise HTTPException(status_code=404, detail="Note template not found")
+        text = template[0]
+        visibility = visibility or template[1]
+    visibility = visibility or "decide_yourself"
+    
+    query = select(Character.id, Character.name).order_by(Character.id)
+    if request.target == "location":
+        query = query.where(Character.location_id == request.location_id)
+    elif request.target == "characters":
+        query = query.where(Character.id.in_(set(request.character_ids)))
+    recipients = (await db.execute(query)).all()
+    if not recipients:
+        return {"created": 0, "character_ids": []}
+    
+    personalized = "{name}" in text
+    created_at = datetime.utcnow()
+    rows = [
+        {
+            "character_id": char_id,
+            "from_gm": True,
+            "text": text.replace("{name}", char_name) if personalized else text,
+            "visibility": visibility,
+            "created_at": created_at
+        }
+        for char_id, char_name in recipients
+    ]
+    result = await db.execute(insert(Note).returning(Note.id, Note.character_id), rows)
+    ids = {char_id: note_id for note_id, char_id in result.all()}
+    await db.commit()
+    
+    for row in rows:
+        note_hub.publish(NoteEntry.model_validate({**row, "id": ids[row["character_id"]]}).model_dump())
+    
+    return {"created": len(rows), "character_ids": [row["character_id"] for row in rows]}
 
 
-@router.post("/master/locations")
+@router.post("/master/locations", response_model=LocationSummary)
 async def create_location(
     request: LocationCreateRequest,
     db: AsyncSession = Depends(get_db)
@@ -350,97 +498,122 @@ async def create_location(
     db.add(location)
     await db.commit()
     await db.refresh(location)
+    await catalog_cache.invalidate("locations")
     
-    return {
-        "id": location.id,
-        "name": location.name,
-        "description": location.description,
-        "tags": location.tags
-    }
+    return location
 
 
-@router.get("/master/locations")
+@router.get("/master/locations", response_model=List[LocationEntry])
 async def get_locations(
+    request: Request,
     db: AsyncSession = Depends(get_db)
 ):
     """Get all locations (master only)"""
-    result = await db.execute(select(Location))
-    locations = result.scalars().all()
-    
-    # Get characters in each location
-    result = await db.execute(select(Character))
-    characters = result.scalars().all()
-    
-    location_data = []
-    for loc in locations:
-        chars_in_location = [c for c in characters if c.location_id == loc.id]
-        location_data.append({
-            "id": loc.id,
-            "name": loc.name,
-            "description": loc.description,
-            "tags": loc.tags or [],
-            "is_active": loc.is_active,
-            "characters": [
-                {"id": c.id, "name": c.name}
-                for c in chars_in_location
-            ]
-        })
-    
-    return location_data
-
-
-@router.post("/master/move-character")
+    async def load():
+        result = await db.execute(
+            select(Location.id, Location.name, Location.description, Location.tags, Location.is_active)
+        )
+        locations = result.all()
+        
+        # Occupants grouped by location in one pass; only id/name are loaded
+        result = await db.execute(
+            select(Character.id, Character.name, Character.location_id)
+            .where(Character.location_id.isnot(None))
+            .order_by(Character.id)
+        )
+        occupants: Dict[int, List[Dict[str, Any]]] = {}
+        for char_id, char_name, location_id in result.all():
+            occupants.setdefault(location_id, []).append({"id": char_id, "name": char_name})
+        
+        location_data = row_dicts(locations, tags=list)
+        for loc in location_data:
+            loc["characters"] = occupants.get(loc["id"], [])
+        return location_data
+    
+    return await catalog_cache.respond(request, "locations", load)
+
+
+@router.post("/master/move-character", response_model=MessageResponse)
 async def move_character(
     request: MoveCharacterRequest,
     db: AsyncSession = Depends(get_db)
 ):
     """Move character to location (master only)"""
-    result = await db.execute(select(Character).where(Character.id == request.character_id))
-    character = result.scalar_one_or_none()
-    if not character:
+    result = await db.execute(
+        update(Character)
+        .where(Character.id == request.character_id)
+        .values(location_id=request.location_id, version=Character.version + 1)
+        .returning(Character.id)
+        .execution_options(synchronize_session=False)
+    )
+    if result.first() is None:
         raise HTTPException(status_code=404, detail="Character not found")
-    
-    character.location_id = request.location_id
     await db.commit()
+    await catalog_cache.invalidate("locations")
     
     return {"message": "Character moved successfully"}
 
 
-@router.get("/master/mobs")
+@router.post("/master/move-characters", response_model=MoveCharactersResponse)
+async def move_characters(
+    request: MoveCharactersRequest,
+    db: AsyncSession = Depends(get_db)
+):
+    """Move several characters (e.g. the party) to one location in one UPDATE (master only)"""
+    if await db.get(Location, request.location_id) is None:
+        raise HTTPException(status_code=404, detail="Location not found")
+    
+    result = await db.execute(
+        update(Character)
+        .where(Character.id.in_(set(request.character_ids)))
+        .values(location_id=request.location_id, version=Character.version + 1)
+        .returning(Character.id)
+        .execution_options(synchronize_session=False)
+    )
+    moved = set(result.scalars().all())
+    await db.commit()
+    if moved:
+        await catalog_cache.invalidate("locations")
+    
+    return {
+        "location_id": request.location_id,
+        "results": [
+            {"character_id": char_id, "status": "moved" if char_id in moved else "not_found"}
+            for char_id in request.character_ids
+        ]
+    }
+
+
+@router.get("/master/mobs", response_model=List[MobEntry])
 async def get_mobs(
+    request: Request,
     location_id: Optional[int] = None,
     db: AsyncSession = Depends(get_db)
 ):
     """Get mobs (master only)"""
-    query = select(Mob)
-    if location_id:
-        query = query.join(LocationMob).where(LocationMob.location_id == location_id)
-    
-    result = await db.execute(query)
-    mobs = result.scalars().all()
+    async def load():
+        query = select(
+            Mob.id, Mob.name, Mob.description, Mob.base_hp, Mob.base_damage,
+            Mob.dice_pattern, Mob.public_description, Mob.gm_notes
+        )
+        if location_id:
+            query = query.join(LocationMob).where(LocationMob.location_id == location_id)
+        
+        result = await db.execute(query)
+        return row_dicts(result.all())
     
-    return [
-        {
-            "id": mob.id,
-            "name": mob.name,
-            "description": mob.description,
-            "base_hp": mob.base_hp,
-            "base_damage": mob.base_damage,
-            "dice_pattern": mob.dice_pattern,
-            "public_description": mob.public_description,
-            "gm_notes": mob.gm_notes
-        }
-        for mob in mobs
-    ]
+    return await catalog_cache.respond(request, "mobs", load, location_id=location_id)
 
 
-@router.post("/master/spawn-mob")
+@router.post("/master/spawn-mob", response_model=SpawnedMob)
 async def spawn_mob(
     request: SpawnMobRequest,
     db: AsyncSession = Depends(get_db)
 ):
     """Spawn mob instance in location (master only)"""
-    result = await db.execute(select(Mob).where(Mob.id == request.mob_id))
+    result = await db.execute(
+        select(Mob).where(Mob.id == request.mob_id).options(undefer(Mob.public_description))
+    )
     mob = result.scalar_one_or_none()
     if not mob:
         raise HTTPException(status_code=404, detail="Mob not found")
@@ -461,118 +634,259 @@ async def spawn_mob(
     db.add(mob_instance)
     await db.commit()
     await db.refresh(mob_instance)
+    await catalog_cache.invalidate("mobs")
     
     return {
         "id": mob_instance.id,
-        "mob": {
-            "id": mob.id,
-            "name": mob.name,
-            "public_description": mob.public_description
-        },
+        "mob": mob,
         "rolled_stats": rolled_stats,
         "hp_current": mob_instance.hp_current
     }
 
 
-@router.get("/master/items")
+@router.get("/master/items", response_model=List[ItemEntry])
 async def get_items(
+    request: Request,
     db: AsyncSession = Depends(get_db)
 ):
     """Get all items (master only)"""
-    result = await db.execute(select(Item))
-    items = result.scalars().all()
+    async def load():
+        result = await db.execute(select(
+            Item.id, Item.name, Item.short_description, Item.long_description,
+            Item.base_stats, Item.rarity, Item.charges, Item.cooldown
+        ))
+        return row_dicts(result.all(), base_stats=dict)
     
-    return [
-        {
-            "id": item.id,
-            "name": item.name,
-            "short_description": item.short_description,
-            "long_description": item.long_description,
-            "base_stats": item.base_stats or {},
-            "rarity": item.rarity,
-            "charges": item.charges,
-            "cooldown": item.cooldown
-        }
-        for item in items
-    ]
+    return await catalog_cache.respond(request, "items", load)
 
 
-@router.post("/master/give-item")
+@router.post("/master/give-item", response_model=GiveItemResponse)
 async def give_item(
     request: GiveItemRequest,
     db: AsyncSession = Depends(get_db)
 ):
     """Give item to character (master only)"""
-    result = await db.execute(
-        select(CharacterItem).where(
-            and_(
-                CharacterItem.character_id == request.character_id,
-                CharacterItem.item_id == request.item_id
-            )
-        )
-    )
-    char_item = result.scalar_one_or_none()
-    
-    if char_item:
-        char_item.quantity += request.quantity
-    else:
-        char_item = CharacterItem(
-            character_id=request.character_id,
-            item_id=request.item_id,
-            quantity=request.quantity
-        )
-        db.add(char_item)
+    # Checked up front: SQLite does not enforce the foreign keys by default
+    if await db.scalar(select(Character.id).where(Character.id == request.character_id)) is None:
+        raise HTTPException(status_code=404, detail="Character not found")
+    if await db.scalar(select(Item.id).where(Item.id == request.item_id)) is None:
+        raise HTTPException(status_code=404, detail="Item not found")
     
-    await db.commit()
+    try:
+        stacks = await upsert_character_items(db, {(request.character_id, request.item_id): request.quantity})
+        await db.commit()
+    except IntegrityError:
+        # Deleted after the lookup
+        await db.rollback()
+        raise HTTPException(status_code=404, detail="Character or item not found")
     
-    return {"message": "Item given successfully"}
+    return {"message": "Item given successfully", "quantity": stacks[(request.character_id, request.item_id)]}
 
 
-@router.put("/master/character/{character_id}")
+@router.post("/master/give-items", response_model=GiveItemsResponse)
+async def give_items(
+    request: GiveItemsRequest,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Give many items to many characters in one transaction (master only).
+    Results are in input order; grants naming a missing character or item
+    are reported as not_found and the rest still apply.
+    """
+    character_ids = {grant.character_id for grant in request.grants}
+    item_ids = {grant.item_id for grant in request.grants}
+    found_characters = set((await db.execute(select(Character.id).where(Character.id.in_(character_ids)))).scalars())
+    found_items = set((await db.execute(select(Item.id).where(Item.id.in_(item_ids)))).scalars())
+    
+    # Repeated (character, item) pairs are summed: one upsert may touch a row only once
+    quantities: Dict[Tuple[int, int], int] = {}
+    for grant in request.grants:
+        if grant.character_id in found_characters and grant.item_id in found_items:
+            key = (grant.character_id, grant.item_id)
+            quantities[key] = quantities.get(key, 0) + grant.quantity
+    
+    try:
+        stacks = await upsert_character_items(db, quantities) if quantities else {}
+        await db.commit()
+    except IntegrityError:
+        # A character or item was deleted after the lookup
+        await db.rollback()
+        raise HTTPException(status_code=409, detail="Characters or items changed, retry")
+    
+    results = []
+    for grant in request.grants:
+        result = {"character_id": grant.character_id, "item_id": grant.item_id, "status": "ok"}
+        if grant.character_id not in found_characters:
+            result.update(status="not_found", detail="Character not found")
+        elif grant.item_id not in found_items:
+            result.update(status="not_found", detail="Item not found")
+        else:
+            result["quantity"] = stacks[(grant.character_id, grant.item_id)]
+        results.append(result)
+    
+    return {"results": results}
+
+
+async def upsert_character_items(
+    db: AsyncSession,
+    quantities: Dict[Tuple[int, int], int]
+) -> Dict[Tuple[int, int], int]:
+    """
+    Add quantities to (character_id, item_id) stacks with one atomic
+    INSERT ... ON CONFLICT DO UPDATE, so concurrent grants add up instead of
+    overwriting each other or creating a second stack. Returns the new
+    stack sizes; the caller commits.
+    """
+    stmt = dialect_insert(CharacterItem).values([
+        {"character_id": character_id, "item_id": item_id, "quantity": quantity}
+        for (character_id, item_id), quantity in quantities.items()
+    ])
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[CharacterItem.character_id, CharacterItem.item_id],
+        set_={"quantity": func.coalesce(CharacterItem.quantity, 0) + stmt.excluded.quantity}
+    ).returning(CharacterItem.character_id, CharacterItem.item_id, CharacterItem.quantity)
+    
+    result = await db.execute(stmt)
+    return {(character_id, item_id): quantity for character_id, item_id, quantity in result.all()}
+
+
+@router.put("/master/character/{character_id}", response_model=CharacterUpdateResponse)
 async def update_character(
     character_id: int,
     data: CharacterUpdateRequest,
     db: AsyncSession = Depends(get_db)
 ):
-    """Update character (master only)"""
-    result = await db.execute(select(Character).where(Character.id == character_id))
-    character = result.scalar_one_or_none()
-    if not character:
-        raise HTTPException(status_code=404, detail="Character not found")
-    
-    # Update fields
+    """
+    Update character (master only).
+    A single UPDATE with no prior read: hp_delta is applied server-side, and
+    with expected_version the write only succeeds if nobody changed the
+    character since that version was read (409 otherwise).
+    """
     update_data = data.dict(exclude_unset=True)
-    for key, value in update_data.items():
-        if hasattr(character, key):
-            setattr(character, key, value)
+    expected_version = update_data.pop("expected_version", None)
+    hp_delta = update_data.pop("hp_delta", None)
+    if hp_delta is not None and "hp_current" in update_data:
+        raise HTTPException(status_code=400, detail="Send either hp_current or hp_delta")
     
-    await db.commit()
-    await db.refresh(character)
+    values = {key: value for key, value in update_data.items() if hasattr(Character, key)}
+    if "name" in values:
+        values["name_key"] = normalize_name(values["name"])
+    if hp_delta is not None:
+        values["hp_current"] = func.coalesce(Character.hp_current, 0) + hp_delta
     
-    return {"message": "Character updated successfully"}
+    updated = await update_character_row(db, character_id, values, expected_version)
+    
+    # Location occupants (name, location) are part of the locations catalog
+    await catalog_cache.invalidate("locations")
+    if "name" in update_data:
+        character_name_cache.clear()
+    
+    return {
+        "message": "Character updated successfully",
+        "version": updated.version,
+        "hp_current": updated.hp_current
+    }
 
 
-@router.post("/master/import/excel")
+@router.patch("/master/character/{character_id}/sheet", response_model=SheetPatchResponse)
+async def patch_character_sheet(
+    character_id: int,
+    data: CharacterSheetPatchRequest,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Edit stats/abilities/notes in place (master only): only the changed
+    paths are sent, and the database applies them to the stored documents.
+    All operations apply or none; a path that does not fit the stored
+    sheet is a 400.
+    """
+    steps = sheet_patch_steps(data.operations)
+    try:
+        (values, condition), *rest = steps
+        updated = await update_character_row(
+            db, character_id, values, data.expected_version, condition, commit=False
+        )
+        for values, condition in rest:
+            result = await db.execute(
+                update(Character)
+                .where(Character.id == character_id, condition)
+                .values(**values)
+                .execution_options(synchronize_session=False)
+            )
+            if result.rowcount == 0:
+                raise HTTPException(status_code=400, detail="Path does not match the character sheet")
+        await db.commit()
+    except DBAPIError as e:
+        await db.rollback()
+        raise HTTPException(status_code=400, detail=f"Cannot apply operations: {e.orig}")
+    except HTTPException:
+        await db.rollback()
+        raise
+    return {"message": "Character updated successfully", "version": updated.version}
+
+
+async def update_character_row(
+    db: AsyncSession,
+    character_id: int,
+    values: Dict[str, Any],
+    expected_version: Optional[int] = None,
+    condition: Any = None,
+    commit: bool = True
+):
+    """
+    One UPDATE of the character that bumps its version and commits; with
+    expected_version it only applies if the version still matches (409),
+    with condition only if that holds too (400).
+    """
+    stmt = update(Character).where(Character.id == character_id)
+    if expected_version is not None:
+        stmt = stmt.where(Character.version == expected_version)
+    if condition is not None:
+        stmt = stmt.where(condition)
+    result = await db.execute(
+        stmt.values(**values, version=Character.version + 1)
+        .returning(Character.version, Character.hp_current)
+        .execution_options(synchronize_session=False)
+    )
+    updated = result.first()
+    if updated is None:
+        await db.rollback()
+        current_version = await db.scalar(select(Character.version).where(Character.id == character_id))
+        if current_version is None:
+            raise HTTPException(status_code=404, detail="Character not found")
+        if condition is not None and expected_version in (None, current_version):
+            raise HTTPException(status_code=400, detail="Path does not match the character sheet")
+        raise HTTPException(
+            status_code=409,
+            detail={"message": "Character was modified by someone else", "version": current_version}
+        )
+    if commit:
+        await db.commit()
+    return updated
+
+
+@router.post("/master/import/excel", response_model=ImportResponse)
 async def import_excel(
     file: UploadFile = File(...),
     db: AsyncSession = Depends(get_db)
 ):
     """Import data from Excel file (master only)"""
-    # Save file temporarily
-    import os
-    upload_dir = "/app/uploads"
-    os.makedirs(upload_dir, exist_ok=True)
-    file_path = os.path.join(upload_dir, file.filename)
-    
-    with open(file_path, "wb") as f:
-        content = await file.read()
-        f.write(content)
-    
+    # The upload is already spooled by the multipart parser (memory, then a
+    # private temp file); hand that file straight to the parser, no copy.
+    # BodySizeLimitMiddleware has already cut off bodies far over the limit.
+    size = file.size
+    if size is None:
+        file.file.seek(0, os.SEEK_END)
+        size = file.file.tell()
+    if size > EXCEL_IMPORT_MAX_BYTES:
+        raise HTTPException(status_code=413, detail="File too large")
+    
+    file.file.seek(0)
     try:
-        # Import data
-        result = await import_excel_data(file_path, db)
-        return result
+        return await import_excel_data(file.file, db)
     finally:
-        # Clean up
-        if os.path.exists(file_path):
-            os.remove(file_path)
+        # Sheets are committed one by one, so even a failed import may have written
+        await catalog_cache.invalidate("items", "mobs", "locations")
+        character_name_cache.clear()
+        note_template_cache.clear()
+        await file.close()
@@ -1,13 +1,19 @@
-from pydantic import BaseModel
-from typing import Optional, Dict, Any, List
+from pydantic import AliasPath, BaseModel, BeforeValidator, ConfigDict, Field, model_validator
+from typing import Optional, Dict, Any, List, Literal, Union
+from typing_extensions import Annotated
+from datetime import datetime
 
 
 class DiceRollRequest(BaseModel):
-    dice_type: str
+    dice_type: str = Field(..., max_length=20)  # stored in dice_rolls.type, String(20)
     character_id: Optional[int] = None
     context: Optional[Dict[str, Any]] = None
 
 
+class DiceRollBatchRequest(BaseModel):
+    rolls: List[DiceRollRequest] = Field(..., min_length=1, max_length=500)
+
+
 class AuthPlayerRequest(BaseModel):
     character_name: str
 
@@ -22,6 +28,26 @@ class NoteCreateRequest(BaseModel):
     visibility: str = "decide_yourself"
 
 
+class BroadcastNoteRequest(BaseModel):
+    """A note for many characters: a template or text, "{name}" becomes each character's name"""
+    template_id: Optional[int] = None
+    text: Optional[str] = None
+    visibility: Optional[str] = None  # default: the template's, else decide_yourself
+    target: Literal["all", "location", "characters"]
+    location_id: Optional[int] = None
+    character_ids: Optional[List[int]] = Field(None, max_length=1000)
+
+    @model_validator(mode="after")
+    def _check_target(self):
+        if (self.template_id is None) == (self.text is None):
+            raise ValueError("Send either template_id or text")
+        if self.target == "location" and self.location_id is None:
+            raise ValueError("location target needs location_id")
+        if self.target == "characters" and not self.character_ids:
+            raise ValueError("characters target needs character_ids")
+        return self
+
+
 class LocationCreateRequest(BaseModel):
     name: str
     description: Optional[str] = None
@@ -44,6 +70,15 @@ class GiveItemRequest(BaseModel):
     quantity: int = 1
 
 
+class GiveItemsRequest(BaseModel):
+    grants: List[GiveItemRequest] = Field(..., min_length=1, max_length=500)
+
+
+class MoveCharactersRequest(BaseModel):
+    character_ids: List[int] = Field(..., min_length=1, max_length=500)
+    location_id: int
+
+
 class AssignCharacterRequest(BaseModel):
     user_id: int
     character_id: int
@@ -60,4 +95,281 @@ class CharacterUpdateRequest(BaseModel):
     stats: Optional[Dict[str, Any]] = None
     abilities: Optional[List[str]] = None
     location_id: Optional[int] = None
+    hp_delta: Optional[int] = None  # atomic change of hp_current, e.g. -7 for damage
+    expected_version: Optional[int] = None  # Character.version the client last read
+
+
+class SheetOperation(BaseModel):
+    """One in-place edit: {"op": "set", "field": "stats", "path": ["str"], "value": 12}"""
+    op: Literal["set", "append", "remove"]
+    field: Literal["stats", "abilities", "notes_visible_to_player", "notes_hidden_from_player"]
+    path: List[Union[int, str]] = Field(default_factory=list, max_length=16)
+    value: Any = None
+
+    @model_validator(mode="after")
+    def _check_path(self):
+        if self.op == "remove" and not self.path:
+            raise ValueError("remove needs a path")
+        if any(isinstance(segment, int) and segment < 0 for segment in self.path):
+            raise ValueError("array indexes in path must be >= 0")
+        # stats is an object, the other fields are arrays
+        if self.path and isinstance(self.path[0], int) != (self.field != "stats"):
+            kind = "a key (string)" if self.field == "stats" else "an index (integer)"
+            raise ValueError(f"path of {self.field} must start with {kind}")
+        if self.op == "set" and not self.path and not isinstance(self.value, dict if self.field == "stats" else list):
+            kind = "an object" if self.field == "stats" else "an array"
+            raise ValueError(f"{self.field} must be set to {kind}")
+        return self
+
+
+class CharacterSheetPatchRequest(BaseModel):
+    operations: List[SheetOperation] = Field(..., min_length=1, max_length=100)
+    expected_version: Optional[int] = None
+
+
+
+# Responses. Built straight from ORM objects and SQLAlchemy Row tuples
+# (from_attributes), validated and serialized by pydantic-core.
+
+# NULL JSON columns are returned as empty containers
+JsonDict = Annotated[Dict[str, Any], BeforeValidator(lambda value: value or {})]
+JsonList = Annotated[List[Any], BeforeValidator(lambda value: value or [])]
+
+
+class ResponseModel(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+
+class MessageResponse(ResponseModel):
+    message: str
+
+
+class PlayerAuthResponse(ResponseModel):
+    type: str
+    character_id: int
+    character_name: str
+
+
+class MasterAuthResponse(ResponseModel):
+    type: str
+
+
+class LocationSummary(ResponseModel):
+    id: int
+    name: str
+    description: Optional[str] = None
+    tags: JsonList = []
+
+
+class CharacterDetail(ResponseModel):
+    id: int
+    name: str
+    version: int
+    age: Optional[int] = None
+    description: Optional[str] = None
+    backstory: Optional[str] = None
+    hp_current: Optional[int] = None
+    hp_max: Optional[int] = None
+    damage_base: Optional[int] = None
+    stats: JsonDict = {}
+    abilities: JsonList = []
+    notes_visible_to_player: JsonList = []
+    location_id: Optional[int] = None
+    location: Optional[LocationSummary] = None
+
+
+class InventoryEntry(ResponseModel):
+    """A CharacterItem with its Item's fields inlined"""
+    id: int = Field(validation_alias=AliasPath("item", "id"))
+    name: str = Field(validation_alias=AliasPath("item", "name"))
+    short_description: Optional[str] = Field(None, validation_alias=AliasPath("item", "short_description"))
+    long_description: Optional[str] = Field(None, validation_alias=AliasPath("item", "long_description"))
+    base_stats: JsonDict = Field({}, validation_alias=AliasPath("item", "base_stats"))
+    rarity: Optional[str] = Field(None, validation_alias=AliasPath("item", "rarity"))
+    charges: Optional[int] = Field(None, validation_alias=AliasPath("item", "charges"))
+    cooldown: Optional[int] = Field(None, validation_alias=AliasPath("item", "cooldown"))
+    quantity: Optional[int] = None
+    state: Optional[str] = None
+    cooldown_until: Optional[datetime] = None
+
+
+class CharacterNote(ResponseModel):
+    id: int
+    text: str
+    visibility: Optional[str] = None
+    from_gm: Optional[bool] = None
+    created_at: datetime
+
+
+class CharacterResponse(ResponseModel):
+    character: CharacterDetail
+    inventory: List[InventoryEntry]
+    notes: List[CharacterNote]
+
+
+class DiceRollResult(ResponseModel):
+    type: str
+    value: int
+
+
+class DiceRollEntry(ResponseModel):
+    id: int
+    character_id: Optional[int] = None
+    character_name: Annotated[str, BeforeValidator(lambda value: value or "Неизвестно")]
+    type: str
+    value: int
+    context: JsonDict = {}
+    created_at: datetime
+
+
+class DiceWriterStats(ResponseModel):
+    running: bool
+    queue_depth: int
+    queue_size: int
+    flushed_total: int
+    failed_total: int
+    last_flush_lag_seconds: float
+
+
+class NoteEntry(ResponseModel):
+    id: int
+    character_id: Optional[int] = None
+    text: str
+    visibility: Optional[str] = None
+    from_gm: Optional[bool] = None
+    created_at: datetime
+
+
+class LastRoll(ResponseModel):
+    type: str
+    value: int
+    created_at: datetime
+
+
+class DashboardCharacter(ResponseModel):
+    id: int
+    name: str
+    hp_current: Optional[int] = None
+    hp_max: Optional[int] = None
+    location_id: Optional[int] = None
+    version: int
+    last_roll: Optional[LastRoll] = None
+
+
+class DashboardResponse(ResponseModel):
+    characters: List[DashboardCharacter]
+
+
+class CharacterSummary(ResponseModel):
+    id: int
+    name: str
+    hp_current: Optional[int] = None
+    hp_max: Optional[int] = None
+    location_id: Optional[int] = None
+
+
+class CreatedNote(ResponseModel):
+    id: int
+    character_id: Optional[int] = None
+    text: str
+    visibility: Optional[str] = None
+    created_at: datetime
+
+
+class BroadcastNoteResponse(ResponseModel):
+    created: int
+    character_ids: List[int]
+
+
+class CharacterRef(ResponseModel):
+    id: int
+    name: str
+
+
+class LocationEntry(LocationSummary):
+    is_active: Optional[bool] = None
+    characters: List[CharacterRef] = []
+
+
+class MobEntry(ResponseModel):
+    id: int
+    name: str
+    description: Optional[str] = None
+    base_hp: Optional[int] = None
+    base_damage: Optional[int] = None
+    dice_pattern: Optional[str] = None
+    public_description: Optional[str] = None
+    gm_notes: Optional[str] = None
+
+
+class MobRef(ResponseModel):
+    id: int
+    name: str
+    public_description: Optional[str] = None
+
+
+class SpawnedMob(ResponseModel):
+    id: int
+    mob: MobRef
+    rolled_stats: JsonDict = {}
+    hp_current: Optional[int] = None
+
+
+class ItemEntry(ResponseModel):
+    id: int
+    name: str
+    short_description: Optional[str] = None
+    long_description: Optional[str] = None
+    base_stats: JsonDict = {}
+    rarity: Optional[str] = None
+    charges: Optional[int] = None
+    cooldown: Optional[int] = None
+
+
+class GiveItemResponse(MessageResponse):
+    quantity: int
+
+
+class GrantResult(ResponseModel):
+    character_id: int
+    item_id: int
+    status: Literal["ok", "not_found"]
+    detail: Optional[str] = None
+    quantity: Optional[int] = None  # stack size after the grant
+
+
+class GiveItemsResponse(ResponseModel):
+    results: List[GrantResult]
+
+
+class MoveResult(ResponseModel):
+    character_id: int
+    status: Literal["moved", "not_found"]
+
+
+class MoveCharactersResponse(ResponseModel):
+    location_id: int
+    results: List[MoveResult]
+
+
+class CharacterUpdateResponse(MessageResponse):
+    version: int
+    hp_current: Optional[int] = None
+
+
+class SheetPatchResponse(MessageResponse):
+    version: int
+
+
+class SheetImportResult(ResponseModel):
+    created: int
+    updated: int
+    errors: List[str]
+
 
+class ImportResponse(ResponseModel):
+    characters: SheetImportResult
+    mobs: SheetImportResult
+    locations: SheetImportResult
+    items: SheetImportResult
+    notes_templates: SheetImportResult
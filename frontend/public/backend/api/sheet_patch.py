@@ -0,0 +1,134 @@
+"""
+In-place updates of a character's JSON documents (stats, abilities, notes_*).
+Operations become one SQL expression per column, so the database edits the
+stored document and the full sheet never travels to the app and back.
+"""
+import json
+from typing import Any, Dict, List, Sequence, Tuple, Union
+
+from sqlalchemy import Text, and_, case, false, func, literal, literal_column, or_
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB
+
+from database import Character, engine
+
+PathSegment = Union[str, int]
+
+# Column -> empty document used when the stored value is NULL or JSON null
+# (the JSON type stores None as null)
+SHEET_FIELDS = {
+    "stats": {},
+    "abilities": [],
+    "notes_visible_to_player": [],
+    "notes_hidden_from_player": [],
+}
+
+
+def _pg_path(path: Sequence[PathSegment]):
+    return literal([str(segment) for segment in path], ARRAY(Text))
+
+
+def _pg_document(column, empty):
+    return func.coalesce(func.nullif(column, literal_column("'null'::jsonb", JSONB), type_=JSONB), literal(empty, JSONB), type_=JSONB)
+
+
+def _pg_type(doc, path: Sequence[PathSegment]):
+    return func.jsonb_typeof(doc.op("#>", return_type=JSONB)(_pg_path(path)) if path else doc)
+
+
+def _pg_length(doc, path: Sequence[PathSegment]):
+    return func.jsonb_array_length(doc.op("#>", return_type=JSONB)(_pg_path(path)) if path else doc)
+
+
+def _pg_operation(doc, op: str, path: Sequence[PathSegment], value: Any):
+    """jsonb_set / || / #- on Postgres"""
+    if op == "remove":
+        return doc.op("#-", return_type=JSONB)(_pg_path(path))
+
+    value = literal(value, JSONB)
+    if op == "append":
+        target = doc.op("#>", return_type=JSONB)(_pg_path(path)) if path else doc
+        value = func.coalesce(target, literal([], JSONB), type_=JSONB).op("||", return_type=JSONB)(
+            func.jsonb_build_array(value, type_=JSONB)
+        )
+    if not path:
+        return value
+    return func.jsonb_set(doc, _pg_path(path), value, True, type_=JSONB)
+
+
+def _sqlite_path(path: Sequence[PathSegment]) -> str:
+    return "$" + "".join(f"[{segment}]" if isinstance(segment, int) else "." + json.dumps(segment) for segment in path)
+
+
+def _sqlite_document(column, empty):
+    return func.coalesce(func.nullif(column, "null"), json.dumps(empty))
+
+
+def _sqlite_type(doc, path: Sequence[PathSegment]):
+    return func.json_type(doc, _sqlite_path(path))
+
+
+def _sqlite_length(doc, path: Sequence[PathSegment]):
+    return func.json_array_length(doc, _sqlite_path(path))
+
+
+def _sqlite_operation(doc, op: str, path: Sequence[PathSegment], value: Any):
+    """json_set / json_insert / json_remove on SQLite (local runs)"""
+    json_path = _sqlite_path(path)
+    if op == "remove":
+        return func.json_remove(doc, json_path)
+
+    value = func.json(json.dumps(value))
+    if op == "append":
+        if path:
+            # Create the array first if the path does not hold one yet
+            doc = func.json_set(doc, json_path, func.json(func.coalesce(func.json_extract(doc, json_path), "[]")))
+        return func.json_insert(doc, json_path + "[#]", value)
+    if not path:
+        return value
+    return func.json_set(doc, json_path, value)
+
+
+DIALECTS = {
+    "postgresql": (_pg_document, _pg_type, _pg_length, _pg_operation),
+    "sqlite": (_sqlite_document, _sqlite_type, _sqlite_length, _sqlite_operation),
+}
+
+
+def _path_conditions(doc, json_type, length, op: str, path: Sequence[PathSegment]) -> List[Any]:
+    """
+    The stored document must have the shape the path assumes: every segment
+    steps into an object (string key) or an array (integer index), set only
+    replaces existing array items and append needs an array or nothing at
+    path. Postgres and SQLite disagree on everything else (errors, no-ops,
+    implicit wrapping), so such operations are rejected instead.
+    """
+    conditions = []
+    for depth, segment in enumerate(path):
+        conditions.append(json_type(doc, path[:depth]) == ("array" if isinstance(segment, int) else "object"))
+    if op == "set" and path and isinstance(path[-1], int):
+        # CASE: Postgres may evaluate the length before the type check, and it fails on non-arrays
+        conditions.append(case((json_type(doc, path[:-1]) == "array", length(doc, path[:-1]) > path[-1]), else_=false()))
+    if op == "append":
+        conditions.append(or_(json_type(doc, path).is_(None), json_type(doc, path) == "array"))
+    return conditions
+
+
+def sheet_patch_steps(operations: List[Any]) -> List[Tuple[Dict[str, Any], Any]]:
+    """
+    (UPDATE values, WHERE condition) pairs for Character applying operations
+    (op, field, path, value) in order: set replaces the value at path (the
+    whole document if path is empty), append adds value to the array at
+    path, remove deletes path. A step edits each column at most once, so
+    every operation is built on the stored column and checked against it;
+    the steps must run in order in one transaction.
+    """
+    document, json_type, length, apply = DIALECTS[engine.dialect.name]
+    steps: List[Tuple[Dict[str, Any], List[Any]]] = []
+    for operation in operations:
+        if not steps or operation.field in steps[-1][0]:
+            steps.append(({}, []))
+        values, conditions = steps[-1]
+        doc = document(getattr(Character, operation.field), SHEET_FIELDS[operation.field])
+        conditions.extend(_path_conditions(doc, json_type, length, operation.op, operation.path))
+        values[operation.field] = apply(doc, operation.op, operation.path, operation.value)
+    return [(values, and_(*conditions)) for values, conditions in steps]
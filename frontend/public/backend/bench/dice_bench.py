@@ -0,0 +1,56 @@
+"""
+Dice engine microbenchmark: rolls/sec of api.dice against the previous
+regex + randint implementation.
+
+    python -m bench.dice_bench
+"""
+import random
+import re
+import time
+
+from api import dice
+
+PATTERNS = ["d20", "2d6+1", "4d6kh3", "10d10", "100d6"]
+DURATION = 1.0
+
+
+def legacy_roll(dice_pattern: str) -> int:
+    """Previous parse_and_roll_dice (without kh/kl/! support)"""
+    simple_match = re.match(r'^d(\d+)$', dice_pattern.lower())
+    if simple_match:
+        return random.randint(1, int(simple_match.group(1)))
+
+    complex_match = re.match(r'^(\d+)d(\d+)([+-]\d+)?$', dice_pattern.lower())
+    if complex_match:
+        count = int(complex_match.group(1))
+        sides = int(complex_match.group(2))
+        modifier = int(complex_match.group(3)) if complex_match.group(3) else 0
+        return sum(random.randint(1, sides) for _ in range(count)) + modifier
+
+    raise ValueError(dice_pattern)
+
+
+def rolls_per_second(roll, pattern: str) -> float:
+    count = 0
+    deadline = time.perf_counter() + DURATION
+    while time.perf_counter() < deadline:
+        for _ in range(100):
+            roll(pattern)
+        count += 100
+    return count / DURATION
+
+
+def main() -> None:
+    print(f"{'pattern':<10} {'legacy':>12} {'engine':>12} {'speedup':>8}")
+    for pattern in PATTERNS:
+        engine = rolls_per_second(dice.roll, pattern)
+        try:
+            legacy = rolls_per_second(legacy_roll, pattern)
+        except ValueError:
+            print(f"{pattern:<10} {'-':>12} {engine:>12,.0f} {'-':>8}")
+            continue
+        print(f"{pattern:<10} {legacy:>12,.0f} {engine:>12,.0f} {engine / legacy:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
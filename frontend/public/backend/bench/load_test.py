@@ -0,0 +1,253 @@
+"""
+Load test for the API: seeds a synthetic campaign, drives the hot endpoints
+concurrently through an in-process ASGI client and reports throughput and
+p50/p95/p99 latency. Results are written as JSON so runs can be compared.
+
+    pip install -r bench/requirements.txt
+    python -m bench.load_test --characters 200 --rolls 100000 --output before.json
+    python -m bench.load_test --characters 200 --rolls 100000 --compare before.json
+
+--database-url takes a SQLite (default, a fresh temporary file) or local
+Postgres URL; the database is dropped and re-seeded on every run.
+"""
+import argparse
+import asyncio
+import io
+import json
+import logging
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", help="default: SQLite in a temporary file")
+    parser.add_argument("--characters", type=int, default=50)
+    parser.add_argument("--locations", type=int, default=10)
+    parser.add_argument("--items", type=int, default=200)
+    parser.add_argument("--inventory", type=int, default=10, help="items per character")
+    parser.add_argument("--rolls", type=int, default=10000)
+    parser.add_argument("--notes", type=int, default=2000)
+    parser.add_argument("--import-rows", type=int, default=500, help="rows in the uploaded workbook")
+    parser.add_argument("--requests", type=int, default=500, help="requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="write results JSON here")
+    parser.add_argument("--compare", help="previous results JSON to diff against")
+    return parser.parse_args()
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except Exception:
+        return "unknown"
+
+
+async def seed(args: argparse.Namespace) -> None:
+    """Recreate the schema and fill it with a synthetic campaign"""
+    from sqlalchemy import insert
+    from database import (
+        engine, Base, User, Character, UserCharacter, Location, Item, CharacterItem, Note, DiceRoll,
+        normalize_name
+    )
+
+    rng = random.Random(args.seed)
+    now = datetime.utcnow()
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+        await conn.execute(insert(Location), [
+            {"id": i, "name": f"Location {i}", "description": "x" * 200, "tags": ["bench"], "is_active": True}
+            for i in range(1, args.locations + 1)
+        ])
+        await conn.execute(insert(Item), [
+            {"id": i, "name": f"Item {i}", "short_description": "x" * 50, "long_description": "x" * 500,
+             "base_stats": {"str": rng.randint(0, 3)}, "rarity": "common", "charges": 0, "cooldown": 0}
+            for i in range(1, args.items + 1)
+        ])
+        await conn.execute(insert(Character), [
+            {"id": i, "name": f"Hero {i}", "name_key": normalize_name(f"Hero {i}"), "age": 30,
+             "description": "x" * 500, "backstory": "x" * 2000, "hp_current": 100, "hp_max": 100,
+             "damage_base": 1, "stats": {"str": 10, "dex": 10, "int": 10, "con": 10, "wis": 10, "cha": 10},
+             "abilities": [f"Ability {n}" for n in range(10)], "notes_visible_to_player": [],
+             "notes_hidden_from_player": [], "location_id": rng.randint(1, args.locations)}
+            for i in range(1, args.characters + 1)
+        ])
+        await conn.execute(insert(User), [
+            {"id": i, "telegram_id": i, "role": "player", "name": f"Player {i}"}
+            for i in range(1, args.characters + 1)
+        ])
+        await conn.execute(insert(UserCharacter), [
+            {"user_id": i, "character_id": i} for i in range(1, args.characters + 1)
+        ])
+        await conn.execute(insert(CharacterItem), [
+            {"character_id": char_id, "item_id": item_id, "quantity": 1, "state": "active"}
+            for char_id in range(1, args.characters + 1)
+            for item_id in rng.sample(range(1, args.items + 1), min(args.inventory, args.items))
+        ])
+
+        for start in range(0, args.notes, 5000):
+            await conn.execute(insert(Note), [
+                {"character_id": rng.randint(1, args.characters), "from_gm": True, "text": "x" * 200,
+                 "visibility": "decide_yourself", "created_at": now - timedelta(seconds=i)}
+                for i in range(start, min(start + 5000, args.notes))
+            ])
+        for start in range(0, args.rolls, 5000):
+            rows = []
+            for i in range(start, min(start + 5000, args.rolls)):
+                char_id = rng.randint(1, args.characters)
+                rows.append({"user_id": char_id, "character_id": char_id, "type": "d20",
+                             "value": rng.randint(1, 20), "context": {}, "created_at": now - timedelta(seconds=i)})
+            await conn.execute(insert(DiceRoll), rows)
+
+
+def build_workbook(rows: int) -> bytes:
+    import openpyxl
+
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.title = "items"
+    sheet.append(["name", "short_description", "rarity", "charges"])
+    for i in range(rows):
+        sheet.append([f"Imported item {i}", "x" * 50, "rare", 3])
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    return buffer.getvalue()
+
+
+def scenarios(args: argparse.Namespace) -> Dict[str, Callable[[Any, random.Random], Awaitable[Any]]]:
+    workbook = build_workbook(args.import_rows)
+    xlsx = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+    def character(rng: random.Random) -> int:
+        return rng.randint(1, args.characters)
+
+    return {
+        "GET /character/{id}": lambda client, rng: client.get(f"/api/character/{character(rng)}"),
+        "POST /dice/roll": lambda client, rng: client.post(
+            "/api/dice/roll", json={"dice_type": "2d6+1", "character_id": character(rng)}
+        ),
+        "GET /dice/rolls": lambda client, rng: client.get("/api/dice/rolls", params={"limit": 50}),
+        "GET /master/dashboard": lambda client, rng: client.get("/api/master/dashboard"),
+        "GET /master/locations": lambda client, rng: client.get("/api/master/locations"),
+        "POST /master/import/excel": lambda client, rng: client.post(
+            "/api/master/import/excel", files={"file": ("bench.xlsx", workbook, xlsx)}
+        ),
+    }
+
+
+async def run_scenario(client, request: Callable, total: int, concurrency: int, seed: int) -> Dict[str, Any]:
+    latencies: List[float] = []
+    errors = 0
+    remaining = iter(range(total))
+
+    async def worker(worker_id: int) -> None:
+        nonlocal errors
+        rng = random.Random(seed + worker_id)
+        for _ in remaining:
+            start = time.perf_counter()
+            response = await request(client, rng)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code >= 400:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+    }
+
+
+def print_results(results: Dict[str, Any], baseline: Dict[str, Any] = None) -> None:
+    print(f"{'endpoint':<28} {'rps':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7}")
+    for name, stats in results["endpoints"].items():
+        line = (f"{name:<28} {stats['throughput_rps']:>9} {stats['p50_ms']:>9} "
+                f"{stats['p95_ms']:>9} {stats['p99_ms']:>9} {stats['errors']:>7}")
+        previous = (baseline or {}).get("endpoints", {}).get(name)
+        if previous and previous["p50_ms"]:
+            change = (stats["p50_ms"] - previous["p50_ms"]) / previous["p50_ms"] * 100
+            line += f"   p50 {change:+.1f}% vs {baseline.get('commit', '?')}"
+        print(line)
+
+
+async def main() -> None:
+    args = parse_args()
+
+    # config reads DATABASE_URL at import time, so set it before importing the app
+    temp_dir = None
+    if not args.database_url:
+        temp_dir = tempfile.TemporaryDirectory()
+        args.database_url = f"sqlite+aiosqlite:///{os.path.join(temp_dir.name, 'bench.db')}"
+    os.environ["DATABASE_URL"] = args.database_url
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+    import httpx
+    from main import app
+    from database import engine
+
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    print(f"Seeding {args.characters} characters, {args.rolls} rolls, {args.notes} notes...")
+    await seed(args)
+
+    results = {
+        "commit": git_commit(),
+        "timestamp": datetime.utcnow().isoformat(),
+        "database": engine.url.get_backend_name(),
+        "scale": {key: getattr(args, key) for key in
+                  ["characters", "locations", "items", "inventory", "rolls", "notes", "import_rows"]},
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "endpoints": {},
+    }
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for name, request in scenarios(args).items():
+            # Imports are heavy; a handful of them is enough
+            total = max(1, args.requests // 50) if "import" in name else args.requests
+            concurrency = min(args.concurrency, total)
+            results["endpoints"][name] = await run_scenario(client, request, total, concurrency, args.seed)
+
+    await engine.dispose()
+    if temp_dir:
+        temp_dir.cleanup()
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print_results(results, baseline)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,82 @@
+"""
+CPU cost per request of the JSON list endpoints: issues sequential requests
+through an in-process ASGI client and reports process CPU time (all threads,
+so DB driver work is included) per request.
+
+    python -m bench.serialize_bench --rolls 20000 --requests 200
+
+Catalog endpoints are measured with their response cache invalidated before
+each request, so every request serializes.
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import tempfile
+import time
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--characters", type=int, default=200)
+    parser.add_argument("--items", type=int, default=500)
+    parser.add_argument("--rolls", type=int, default=20000)
+    parser.add_argument("--notes", type=int, default=5000)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=42)
+    return parser.parse_args()
+
+
+async def main() -> None:
+    args = parse_args()
+    args.locations, args.inventory = 10, 20
+
+    temp_dir = tempfile.TemporaryDirectory()
+    os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{os.path.join(temp_dir.name, 'bench.db')}"
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+    import httpx
+    from main import app
+    from database import engine
+    from api.cache import catalog_cache
+    from bench.load_test import seed
+
+    logging.disable(logging.WARNING)
+    await seed(args)
+
+    endpoints = [
+        ("GET /dice/rolls?limit=50", "/api/dice/rolls?limit=50", None),
+        ("GET /dice/rolls?limit=500", "/api/dice/rolls?limit=500", None),
+        ("GET /notes?limit=500", "/api/notes?limit=500", None),
+        ("GET /character/{id}", "/api/character/1", None),
+        ("GET /master/dashboard", "/api/master/dashboard", None),
+        ("GET /master/characters", "/api/master/characters", None),
+        ("GET /master/items", "/api/master/items", "items"),
+        ("GET /master/mobs", "/api/master/mobs", "mobs"),
+        ("GET /master/locations", "/api/master/locations", "locations"),
+    ]
+
+    print(f"{'endpoint':<28} {'CPU ms/req':>11} {'wall ms/req':>12} {'bytes':>9}")
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for name, url, namespace in endpoints:
+            await client.get(url)  # warm up
+            cpu = wall = 0.0
+            for _ in range(args.requests):
+                if namespace:
+                    await catalog_cache.invalidate(namespace)
+                cpu_start, wall_start = time.process_time(), time.perf_counter()
+                response = await client.get(url)
+                cpu += time.process_time() - cpu_start
+                wall += time.perf_counter() - wall_start
+                response.raise_for_status()
+            print(f"{name:<28} {cpu / args.requests * 1000:>11.3f} "
+                  f"{wall / args.requests * 1000:>12.3f} {len(response.content):>9}")
+
+    await engine.dispose()
+    temp_dir.cleanup()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
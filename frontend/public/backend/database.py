@@ -1,28 +1,180 @@
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
-from sqlalchemy.orm import declarative_base, sessionmaker
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Text, JSON, Numeric
+from sqlalchemy.orm import declarative_base, sessionmaker, relationship, validates, deferred
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Text, JSON, Numeric, Index, UniqueConstraint, text
+from sqlalchemy.dialects.postgresql import JSONB, insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool
 from datetime import datetime
-from config import DATABASE_URL
+from typing import Optional
+from config import (
+    DATABASE_URL, DB_ECHO, DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT,
+    DB_POOL_RECYCLE, DB_POOL_PRE_PING, DB_POOL_LIVENESS_INTERVAL, DB_NULL_POOL,
+    DB_STATEMENT_TIMEOUT_MS, DB_PREPARED_STATEMENT_CACHE_SIZE, DB_CONNECT_TIMEOUT, DB_CONNECT_BACKOFF_MAX
+)
+from metrics import REGISTRY, Counter, Gauge, Histogram
+import asyncio
 import logging
+import random
+import time
 
 logger = logging.getLogger(__name__)
 
 # Convert postgresql:// to postgresql+asyncpg://
 async_database_url = DATABASE_URL.replace("postgresql://", "postgresql+asyncpg://")
 
-# Add connection pool settings and retry logic
-engine = create_async_engine(
-    async_database_url,
-    echo=True,
-    pool_pre_ping=True,  # Verify connections before using them
-    pool_size=5,
-    max_overflow=10,
-    pool_recycle=3600,
-)
+pool_checkout_wait = REGISTRY.register(Histogram(
+    "db_pool_checkout_wait_seconds", "Time spent waiting for a pooled connection"
+))
+pool_checkout_timeouts = REGISTRY.register(Counter(
+    "db_pool_checkout_timeouts_total", "Connection checkouts that hit the pool timeout"
+))
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """
+    Queue pool that records how long each checkout took (Pool.connect():
+    waiting for a free slot plus opening or pre-pinging the connection)
+    """
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        except PoolTimeoutError:
+            pool_checkout_timeouts.inc()
+            raise
+        finally:
+            pool_checkout_wait.observe(time.perf_counter() - start)
+
+
+# SQLAlchemy logs a pool on a logger named after its class, i.e. outside
+# sqlalchemy.pool; keep it quiet like the stock pool (echo_pool still works)
+logging.getLogger(f"{TimedQueuePool.__module__}.{TimedQueuePool.__name__}").setLevel(logging.WARNING)
+
+
+engine_options = {"echo": DB_ECHO, "pool_pre_ping": DB_POOL_PRE_PING}
+if DB_NULL_POOL:
+    # An external pooler (PgBouncer) owns the connections
+    engine_options["poolclass"] = NullPool
+else:
+    engine_options.update(
+        poolclass=TimedQueuePool,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+    )
+
+if async_database_url.startswith("postgresql+asyncpg://"):
+    connect_args = {"prepared_statement_cache_size": DB_PREPARED_STATEMENT_CACHE_SIZE}
+    if DB_PREPARED_STATEMENT_CACHE_SIZE == 0:
+        # asyncpg's own statement cache must be off too behind PgBouncer
+        connect_args["statement_cache_size"] = 0
+    if DB_STATEMENT_TIMEOUT_MS:
+        connect_args["server_settings"] = {"statement_timeout": str(DB_STATEMENT_TIMEOUT_MS)}
+    engine_options["connect_args"] = connect_args
+
+engine = create_async_engine(async_database_url, **engine_options)
+
+
+def pool_status() -> dict:
+    """Checked-out / overflow counts of the connection pool"""
+    pool = engine.pool
+    if not isinstance(pool, AsyncAdaptedQueuePool):
+        return {"size": 0, "checked_out": 0, "overflow": 0, "saturation": 0.0}
+    # Negative max_overflow means unlimited; saturation is then relative to pool_size
+    capacity = pool.size() + max(DB_MAX_OVERFLOW, 0)
+    checked_out = pool.checkedout()
+    return {
+        "size": pool.size(),
+        "checked_out": checked_out,
+        "overflow": max(pool.overflow(), 0),
+        "saturation": round(checked_out / capacity, 4) if capacity else 0.0
+    }
+
+
+REGISTRY.register(Gauge("db_pool_checked_out", "Connections currently checked out", lambda: pool_status()["checked_out"]))
+REGISTRY.register(Gauge("db_pool_overflow", "Connections open beyond pool_size", lambda: pool_status()["overflow"]))
+REGISTRY.register(Gauge("db_pool_saturation", "Checked-out share of pool_size + max_overflow", lambda: pool_status()["saturation"]))
+
+
+async def pool_liveness_loop(interval: float = DB_POOL_LIVENESS_INTERVAL) -> None:
+    """
+    Background alternative to pool_pre_ping: probe the database every
+    interval seconds and drop all pooled connections when it fails, so
+    requests do not pay a ping round trip on every checkout.
+    """
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            async with engine.connect() as conn:
+                await conn.execute(text("SELECT 1"))
+        except Exception as e:
+            logger.warning(f"Database liveness check failed, resetting pool: {e}")
+            await engine.dispose()
+
+
+async def wait_for_database(timeout: float = DB_CONNECT_TIMEOUT, backoff_max: float = DB_CONNECT_BACKOFF_MAX) -> None:
+    """
+    Wait until the database answers SELECT 1, retrying with exponential
+    backoff and full jitter so restarted workers do not probe in lockstep.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    attempt = 0
+    while True:
+        attempt += 1
+        try:
+            async with engine.connect() as conn:
+                await conn.execute(text("SELECT 1"))
+            return
+        except Exception as e:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                logger.error(f"Database not reachable after {attempt} attempts: {e}")
+                raise
+            delay = min(random.uniform(0, min(backoff_max, 0.1 * 2 ** attempt)), remaining)
+            logger.warning(f"Database not reachable (attempt {attempt}), retrying in {delay:.2f}s: {e}")
+            await asyncio.sleep(delay)
+
+
+async def warm_pool(connections: int) -> None:
+    """Open up to `connections` pooled connections at once so first requests skip the connect"""
+    if isinstance(engine.pool, NullPool):
+        return
+    results = await asyncio.gather(
+        *(engine.connect().start() for _ in range(min(connections, DB_POOL_SIZE))), return_exceptions=True
+    )
+    opened = [conn for conn in results if not isinstance(conn, BaseException)]
+    try:
+        for conn in opened:
+            await conn.execute(text("SELECT 1"))
+        for error in results:
+            if isinstance(error, BaseException):
+                raise error
+    finally:
+        for conn in opened:
+            await conn.close()
+
+
+def dialect_insert(model):
+    """INSERT with on_conflict_do_update/do_nothing (Postgres, or SQLite for local runs)"""
+    return (pg_insert if engine.dialect.name == "postgresql" else sqlite_insert)(model)
+
+
 async_session_maker = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 
 Base = declarative_base()
 
+# Binary JSONB on Postgres (in-place path updates, GIN-indexable); plain JSON elsewhere
+JSONDocument = JSON().with_variant(JSONB(), "postgresql")
+
+
+def normalize_name(name: Optional[str]) -> Optional[str]:
+    """Lookup key for names: trimmed and casefolded"""
+    return str(name).strip().casefold() if name is not None else None
+
 
 # Models
 class User(Base):
@@ -39,27 +191,45 @@ class Character(Base):
     __tablename__ = "characters"
     
     id = Column(Integer, primary_key=True)
-    name = Column(String(255), nullable=False)
+    name = Column(String(255), nullable=False, index=True)
+    name_key = Column(String(255), index=True)  # normalize_name(name), used for login
     age = Column(Integer)
-    description = Column(Text)
-    backstory = Column(Text)
+    # Large columns (group "details") load only with undefer_group("details");
+    # a missing undefer raises instead of lazy-loading
+    description = deferred(Column(Text), group="details", raiseload=True)
+    backstory = deferred(Column(Text), group="details", raiseload=True)
     hp_current = Column(Integer, default=100)
     hp_max = Column(Integer, default=100)
     damage_base = Column(Integer, default=1)
-    stats = Column(JSON, default={})  # {str: int, dex: int, int: int, etc.}
-    abilities = Column(JSON, default=[])  # List of ability names/descriptions
-    notes_visible_to_player = Column(JSON, default=[])
-    notes_hidden_from_player = Column(JSON, default=[])
-    location_id = Column(Integer, ForeignKey("locations.id"), nullable=True)
+    stats = deferred(Column(JSONDocument, default={}), group="details", raiseload=True)  # {str: int, dex: int, int: int, etc.}
+    abilities = deferred(Column(JSONDocument, default=[]), group="details", raiseload=True)  # List of ability names/descriptions
+    notes_visible_to_player = deferred(Column(JSONDocument, default=[]), group="details", raiseload=True)
+    notes_hidden_from_player = deferred(Column(JSONDocument, default=[]), group="details", raiseload=True)
+    location_id = Column(Integer, ForeignKey("locations.id"), nullable=True, index=True)
+    # Bumped by every master update; clients send it back as expected_version
+    version = Column(Integer, nullable=False, default=1, server_default="1")
     created_at = Column(DateTime, default=datetime.utcnow)
+    
+    # Loaded explicitly (joinedload/selectinload); lazy loads fail under asyncio
+    location = relationship("Location", lazy="raise")
+    inventory = relationship("CharacterItem", lazy="raise")
+    notes = relationship("Note", order_by="Note.created_at.desc()", lazy="raise")
+    
+    @validates("name")
+    def _sync_name_key(self, key, value):
+        self.name_key = normalize_name(value)
+        return value
 
 
 class UserCharacter(Base):
     __tablename__ = "user_characters"
+    __table_args__ = (
+        UniqueConstraint("user_id", "character_id", name="uq_user_characters_user_character"),
+    )
     
     id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    character_id = Column(Integer, ForeignKey("characters.id"), nullable=False)
+    character_id = Column(Integer, ForeignKey("characters.id"), nullable=False, index=True)
     created_at = Column(DateTime, default=datetime.utcnow)
 
 
@@ -67,7 +237,7 @@ class Location(Base):
     __tablename__ = "locations"
     
     id = Column(Integer, primary_key=True)
-    name = Column(String(255), nullable=False)
+    name = Column(String(255), nullable=False, index=True)
     description = Column(Text)
     tags = Column(JSON, default=[])  # ["город", "подземелье", etc.]
     is_active = Column(Boolean, default=True)
@@ -78,13 +248,13 @@ class Mob(Base):
     __tablename__ = "mobs"
     
     id = Column(Integer, primary_key=True)
-    name = Column(String(255), nullable=False)
-    description = Column(Text)
+    name = Column(String(255), nullable=False, index=True)
+    description = deferred(Column(Text), group="details", raiseload=True)
     base_hp = Column(Integer, default=50)
     base_damage = Column(Integer, default=1)
     dice_pattern = Column(String(50))  # "2d6+1" or similar
-    public_description = Column(Text)  # What players see
-    gm_notes = Column(Text)  # What only GM sees
+    public_description = deferred(Column(Text), group="details", raiseload=True)  # What players see
+    gm_notes = deferred(Column(Text), group="details", raiseload=True)  # What only GM sees
     created_at = Column(DateTime, default=datetime.utcnow)
 
 
@@ -92,8 +262,8 @@ class LocationMob(Base):
     __tablename__ = "location_mobs"
     
     id = Column(Integer, primary_key=True)
-    location_id = Column(Integer, ForeignKey("locations.id"), nullable=False)
-    mob_id = Column(Integer, ForeignKey("mobs.id"), nullable=False)
+    location_id = Column(Integer, ForeignKey("locations.id"), nullable=False, index=True)
+    mob_id = Column(Integer, ForeignKey("mobs.id"), nullable=False, index=True)
     created_at = Column(DateTime, default=datetime.utcnow)
 
 
@@ -101,8 +271,8 @@ class MobInstance(Base):
     __tablename__ = "mob_instances"
     
     id = Column(Integer, primary_key=True)
-    mob_id = Column(Integer, ForeignKey("mobs.id"), nullable=False)
-    location_id = Column(Integer, ForeignKey("locations.id"), nullable=False)
+    mob_id = Column(Integer, ForeignKey("mobs.id"), nullable=False, index=True)
+    location_id = Column(Integer, ForeignKey("locations.id"), nullable=False, index=True)
     rolled_stats = Column(JSON, default={})  # Generated stats for this instance
     hp_current = Column(Integer)
     is_active = Column(Boolean, default=True)
@@ -113,10 +283,10 @@ class Item(Base):
     __tablename__ = "items"
     
     id = Column(Integer, primary_key=True)
-    name = Column(String(255), nullable=False)
-    short_description = Column(Text)
-    long_description = Column(Text)
-    base_stats = Column(JSON, default={})  # Bonuses to stats
+    name = Column(String(255), nullable=False, index=True)
+    short_description = deferred(Column(Text), group="details", raiseload=True)
+    long_description = deferred(Column(Text), group="details", raiseload=True)
+    base_stats = deferred(Column(JSON, default={}), group="details", raiseload=True)  # Bonuses to stats
     rarity = Column(String(50))  # common, uncommon, rare, epic, legendary
     charges = Column(Integer, default=0)  # 0 = unlimited
     cooldown = Column(Integer, default=0)  # Cooldown in seconds
@@ -125,18 +295,29 @@ class Item(Base):
 
 class CharacterItem(Base):
     __tablename__ = "character_items"
+    __table_args__ = (
+        # One stack per item: give_item upserts into it
+        UniqueConstraint("character_id", "item_id", name="uq_character_items_character_item"),
+    )
     
     id = Column(Integer, primary_key=True)
-    character_id = Column(Integer, ForeignKey("characters.id"), nullable=False)
-    item_id = Column(Integer, ForeignKey("items.id"), nullable=False)
+    character_id = Column(Integer, ForeignKey("characters.id"), nullable=False, index=True)
+    item_id = Column(Integer, ForeignKey("items.id"), nullable=False, index=True)
     quantity = Column(Integer, default=1)
     state = Column(String(50), default="active")  # active, broken, cooldown
     cooldown_until = Column(DateTime, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
+    
+    item = relationship("Item", lazy="raise")
 
 
 class Note(Base):
     __tablename__ = "notes"
+    __table_args__ = (
+        # Keyset pages of /notes, with and without the character filter
+        Index("ix_notes_character_created", "character_id", "created_at", "id"),
+        Index("ix_notes_created", "created_at", "id"),
+    )
     
     id = Column(Integer, primary_key=True)
     character_id = Column(Integer, ForeignKey("characters.id"), nullable=True)
@@ -157,9 +338,15 @@ class NoteTemplate(Base):
 
 class DiceRoll(Base):
     __tablename__ = "dice_rolls"
+    __table_args__ = (
+        # Latest roll per character (master dashboard) and per-character history pages
+        Index("ix_dice_rolls_character_created", "character_id", "created_at", "id"),
+        # History pages across all characters
+        Index("ix_dice_rolls_created", "created_at", "id"),
+    )
     
     id = Column(Integer, primary_key=True)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
     character_id = Column(Integer, ForeignKey("characters.id"), nullable=True)
     type = Column(String(20), nullable=False)  # d4, d6, d8, d10, d12, d20, d100, custom
     value = Column(Integer, nullable=False)
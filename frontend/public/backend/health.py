@@ -0,0 +1,107 @@
+"""Liveness/readiness checks for the load balancer"""
+import asyncio
+import logging
+import time
+from typing import Any, Callable, Dict, Optional
+
+from sqlalchemy import text
+
+from database import engine, pool_status
+from metrics import REGISTRY, Gauge
+
+logger = logging.getLogger(__name__)
+
+
+class LoopLagMonitor:
+    """Measures how late the event loop wakes up a task that sleeps for `interval`"""
+
+    def __init__(self, interval: float = 0.25):
+        self.interval = interval
+        self.lag = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            self.lag = max(0.0, loop.time() - start - self.interval)
+
+
+loop_lag = LoopLagMonitor()
+REGISTRY.register(Gauge("event_loop_lag_seconds", "Event loop wake-up delay", lambda: loop_lag.lag))
+
+
+class ReadinessCheck:
+    """
+    Database probe plus pool, event-loop and queue state. The result is
+    cached for `ttl` seconds and concurrent probes share one check, so a
+    busy load balancer costs at most one SELECT 1 per window.
+    """
+
+    def __init__(self, db_timeout: float, ttl: float, max_loop_lag: float):
+        self.db_timeout = db_timeout
+        self.ttl = ttl
+        self.max_loop_lag = max_loop_lag
+        self.queues: Dict[str, Callable[[], Dict[str, Any]]] = {}
+        self._result: Optional[Dict[str, Any]] = None
+        self._expires = 0.0
+        self._lock = asyncio.Lock()
+
+    def add_queue(self, name: str, stats: Callable[[], Dict[str, Any]]) -> None:
+        """Report a background queue; `stats` may return "full": True to fail readiness"""
+        self.queues[name] = stats
+
+    async def check(self) -> Dict[str, Any]:
+        async with self._lock:
+            if self._result is None or time.monotonic() >= self._expires:
+                self._result = await self._run()
+                self._expires = time.monotonic() + self.ttl
+            return self._result
+
+    async def _probe_database(self) -> Dict[str, Any]:
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(self._select_one(), self.db_timeout)
+        except asyncio.TimeoutError:
+            return {"ok": False, "error": f"timed out after {self.db_timeout}s"}
+        except Exception as e:
+            logger.warning(f"Readiness database probe failed: {e}")
+            return {"ok": False, "error": type(e).__name__}
+        return {"ok": True, "latency_ms": round((time.perf_counter() - start) * 1000, 2)}
+
+    async def _select_one(self) -> None:
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+    async def _run(self) -> Dict[str, Any]:
+        database = await self._probe_database()
+        pool = pool_status()
+        queues = {name: stats() for name, stats in self.queues.items()}
+
+        reasons = []
+        if not database["ok"]:
+            reasons.append("database")
+        if pool["saturation"] >= 1:
+            reasons.append("pool_exhausted")
+        if loop_lag.lag > self.max_loop_lag:
+            reasons.append("event_loop_lag")
+        reasons.extend(f"{name}_full" for name, stats in queues.items() if stats.get("full"))
+
+        return {
+            "status": "fail" if reasons else "ok",
+            "reasons": reasons,
+            "database": database,
+            "pool": pool,
+            "event_loop_lag_ms": round(loop_lag.lag * 1000, 2),
+            "queues": queues,
+            "checked_at": time.time(),
+        }
@@ -0,0 +1,123 @@
+"""Per-request latency and database query instrumentation"""
+import logging
+import time
+from collections import Counter as StatementCounter
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy import event
+
+from metrics import REGISTRY, Counter, Histogram
+
+logger = logging.getLogger(__name__)
+
+# Same statement this many times in one request is reported as N+1
+N_PLUS_ONE_THRESHOLD = 10
+
+# Long-lived streams (SSE) would only skew the latency histogram
+STREAMING_ROUTES = {"/api/dice/stream", "/api/notes/stream"}
+
+request_duration = REGISTRY.register(Histogram(
+    "http_request_duration_seconds", "Request latency by route", ["method", "route"]
+))
+requests_total = REGISTRY.register(Counter(
+    "http_requests_total", "Requests by route and status", ["method", "route", "status"]
+))
+request_queries = REGISTRY.register(Histogram(
+    "http_request_db_queries", "Database queries issued per request", ["route"],
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100, 500)
+))
+request_db_time = REGISTRY.register(Histogram(
+    "http_request_db_seconds", "Time spent in the database per request", ["route"]
+))
+n_plus_one_total = REGISTRY.register(Counter(
+    "http_request_n_plus_one_total", "Requests that repeated one statement N_PLUS_ONE_THRESHOLD+ times", ["route"]
+))
+
+
+class QueryStats:
+    __slots__ = ("count", "seconds", "statements")
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.statements = StatementCounter()
+
+
+# Stats of the request being served; SQLAlchemy's asyncio greenlets share the task context
+current_query_stats: ContextVar[Optional[QueryStats]] = ContextVar("current_query_stats", default=None)
+
+
+def instrument_engine(sync_engine) -> None:
+    """Count queries and DB time into the current request's QueryStats"""
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_start"].pop()
+        stats = current_query_stats.get()
+        if stats is not None:
+            stats.count += 1
+            stats.seconds += elapsed
+            stats.statements[statement] += 1
+
+    @event.listens_for(sync_engine, "handle_error")
+    def handle_error(exception_context):
+        conn = exception_context.connection
+        if conn is not None and conn.info.get("query_start"):
+            conn.info["query_start"].pop()
+
+
+class RequestMetricsMiddleware:
+    """
+    ASGI middleware: records latency, query count and DB time per route and
+    adds them to the response as a Server-Timing header.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+        token = current_query_stats.set(stats)
+        start = time.perf_counter()
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                total_ms = (time.perf_counter() - start) * 1000
+                timing = f"app;dur={total_ms:.1f}, db;dur={stats.seconds * 1000:.1f};desc=\"{stats.count} queries\""
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", timing.encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            current_query_stats.reset(token)
+            route = scope.get("route")
+            route_path = getattr(route, "path", None) or "unmatched"
+            method = scope.get("method", "")
+            if getattr(route, "path", None) not in STREAMING_ROUTES:
+                request_duration.observe(time.perf_counter() - start, method=method, route=route_path)
+            requests_total.inc(method=method, route=route_path, status=str(status))
+            request_queries.observe(stats.count, route=route_path)
+            request_db_time.observe(stats.seconds, route=route_path)
+
+            if stats.statements:
+                statement, repeats = stats.statements.most_common(1)[0]
+                if repeats >= N_PLUS_ONE_THRESHOLD:
+                    n_plus_one_total.inc(route=route_path)
+                    logger.warning(
+                        f"Possible N+1 in {method} {route_path}: statement ran {repeats} times: {statement[:200]}"
+                    )
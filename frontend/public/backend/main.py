@@ -2,12 +2,24 @@ import asyncio
 import logging
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI
+import uvicorn
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 
-from api.routes import router as api_router
-from database import engine, Base
-from config import CORS_ORIGINS
+from api.routes import router as api_router, dice_writer
+from api.events import dice_hub, note_hub, close_event_streams
+from api.responses import FastJSONResponse
+from database import engine, pool_liveness_loop, wait_for_database, warm_pool
+from config import (
+    CORS_ORIGINS, DICE_WRITE_BEHIND, DB_POOL_PRE_PING, DB_POOL_LIVENESS_INTERVAL, DB_NULL_POOL,
+    DB_POOL_WARMUP, DB_MIGRATE_ON_STARTUP, SHUTDOWN_GRACE_PERIOD, HEALTH_DB_TIMEOUT, HEALTH_CACHE_TTL,
+    HEALTH_MAX_LOOP_LAG, EXCEL_IMPORT_MAX_BYTES
+)
+from migrate import upgrade_head
+from metrics import REGISTRY
+from instrumentation import RequestMetricsMiddleware, instrument_engine
+from health import ReadinessCheck, loop_lag
+from limits import BodySizeLimitMiddleware, MULTIPART_OVERHEAD
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -18,32 +30,52 @@ async def lifespan(app: FastAPI):
     # Startup
     logger.info("Starting up...")
     
-    # Wait for database to be ready and create tables
-    max_retries = 30
-    retry_count = 0
+    # Cheap connectivity probe with jittered backoff instead of DDL retries
+    await wait_for_database()
+    
+    # Schema changes normally run once per deploy (`python migrate.py`), not per worker
+    if DB_MIGRATE_ON_STARTUP:
+        await asyncio.to_thread(upgrade_head, False)
+        logger.info("Database migrations applied")
+    
+    await warm_pool(DB_POOL_WARMUP)
+    
+    if DICE_WRITE_BEHIND:
+        dice_writer.start()
+        logger.info("Dice roll write-behind enabled")
+    
+    liveness_task = None
+    if DB_POOL_LIVENESS_INTERVAL > 0 and not DB_POOL_PRE_PING and not DB_NULL_POOL:
+        liveness_task = asyncio.create_task(pool_liveness_loop())
     
-    while retry_count < max_retries:
-        try:
-            async with engine.begin() as conn:
-                await conn.run_sync(Base.metadata.create_all)
-            logger.info("Database tables created successfully")
-            break
-        except Exception as e:
-            retry_count += 1
-            if retry_count >= max_retries:
-                logger.error(f"Failed to connect to database after {max_retries} retries: {e}")
-                raise
-            logger.warning(f"Database connection failed (attempt {retry_count}/{max_retries}): {e}")
-            await asyncio.sleep(2)
+    loop_lag.start()
+    app.state.ready = True
+    logger.info("Ready")
     
     yield
     
     # Shutdown
     logger.info("Shutting down...")
+    app.state.ready = False
+    close_event_streams()
+    
+    if liveness_task:
+        liveness_task.cancel()
+    loop_lag.stop()
+    
+    # Flush queued dice rolls before the engine goes away
+    await dice_writer.stop()
+    await engine.dispose()
 
 
 # Create FastAPI app
-app = FastAPI(title="DnD WebApp API", lifespan=lifespan)
+app = FastAPI(title="DnD WebApp API", lifespan=lifespan, default_response_class=FastJSONResponse)
+app.state.ready = False
+
+# Stop oversized uploads while they stream in, before they are spooled to disk
+app.add_middleware(BodySizeLimitMiddleware, limits={
+    "/api/master/import/excel": EXCEL_IMPORT_MAX_BYTES + MULTIPART_OVERHEAD
+})
 
 # CORS middleware
 app.add_middleware(
@@ -52,8 +84,13 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing", "X-Next-Cursor", "ETag"],
 )
 
+# Per-route latency, query count and DB time (exported at /metrics)
+instrument_engine(engine.sync_engine)
+app.add_middleware(RequestMetricsMiddleware)
+
 # Include API routes
 app.include_router(api_router, prefix="/api")
 
@@ -63,11 +100,57 @@ async def root():
     return {"message": "DnD WebApp API", "status": "running"}
 
 
+@app.get("/metrics")
+async def metrics():
+    """Prometheus metrics"""
+    return Response(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+
+readiness = ReadinessCheck(HEALTH_DB_TIMEOUT, HEALTH_CACHE_TTL, HEALTH_MAX_LOOP_LAG)
+readiness.add_queue("dice_write_behind", lambda: {
+    **dice_writer.stats(), "full": dice_writer.running and dice_writer.queue.full()
+})
+readiness.add_queue("dice_stream", lambda: {
+    "subscribers": dice_hub.subscriber_count, "queued": dice_hub.queued
+})
+readiness.add_queue("note_stream", lambda: {
+    "subscribers": note_hub.subscriber_count, "queued": note_hub.queued
+})
+
+
 @app.get("/health")
+@app.get("/health/live")
 async def health():
+    """Liveness: the process serves requests; never touches the database"""
     return {"status": "ok"}
 
 
+@app.get("/health/ready")
+async def health_ready(response: Response):
+    """Readiness: 503 while starting or draining, or when the database, pool or event loop is unhealthy"""
+    if not app.state.ready:
+        response.status_code = 503
+        return {"status": "starting"}
+    result = await readiness.check()
+    if result["status"] != "ok":
+        response.status_code = 503
+    return result
+
+
+class Server(uvicorn.Server):
+    """
+    uvicorn waits for open connections before the lifespan shutdown, and SSE
+    streams never finish on their own: end them first so shutdown can drain
+    the dice write-behind queue. Under the plain `uvicorn` CLI pass
+    --timeout-graceful-shutdown instead; open streams are then cancelled.
+    """
+
+    async def shutdown(self, sockets=None):
+        close_event_streams()
+        await super().shutdown(sockets=sockets)
+
+
 if __name__ == "__main__":
-    import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    Server(uvicorn.Config(
+        app, host="0.0.0.0", port=8000, timeout_graceful_shutdown=SHUTDOWN_GRACE_PERIOD
+    )).run()
@@ -0,0 +1,26 @@
+"""
+One-shot schema migration: `python migrate.py` (same as `alembic upgrade head`).
+Run it once per deploy before starting the API workers.
+"""
+import os
+
+from alembic import command
+from alembic.config import Config
+
+ALEMBIC_INI = os.path.join(os.path.dirname(os.path.abspath(__file__)), "alembic.ini")
+
+
+def alembic_config(configure_logging: bool = True) -> Config:
+    config = Config(ALEMBIC_INI)
+    config.set_main_option("script_location", os.path.join(os.path.dirname(ALEMBIC_INI), "migrations"))
+    config.attributes["configure_logger"] = configure_logging
+    return config
+
+
+def upgrade_head(configure_logging: bool = True) -> None:
+    """Apply all pending migrations; blocks, so call it from a worker thread in async code"""
+    command.upgrade(alembic_config(configure_logging), "head")
+
+
+if __name__ == "__main__":
+    upgrade_head()
@@ -0,0 +1,160 @@
+"""initial schema
+
+Tables as created by the original Base.metadata.create_all startup.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "users",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("telegram_id", sa.Integer(), nullable=False),
+        sa.Column("role", sa.String(20), nullable=False),
+        sa.Column("name", sa.String(255)),
+        sa.Column("created_at", sa.DateTime()),
+    )
+    op.create_index("ix_users_telegram_id", "users", ["telegram_id"], unique=True)
+
+    op.create_table(
+        "locations",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(255), nullable=False),
+        sa.Column("description", sa.Text()),
+        sa.Column("tags", sa.JSON()),
+        sa.Column("is_active", sa.Boolean()),
+        sa.Column("created_at", sa.DateTime()),
+    )
+
+    op.create_table(
+        "characters",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(255), nullable=False),
+        sa.Column("age", sa.Integer()),
+        sa.Column("description", sa.Text()),
+        sa.Column("backstory", sa.Text()),
+        sa.Column("hp_current", sa.Integer()),
+        sa.Column("hp_max", sa.Integer()),
+        sa.Column("damage_base", sa.Integer()),
+        sa.Column("stats", sa.JSON()),
+        sa.Column("abilities", sa.JSON()),
+        sa.Column("notes_visible_to_player", sa.JSON()),
+        sa.Column("notes_hidden_from_player", sa.JSON()),
+        sa.Column("location_id", sa.Integer(), sa.ForeignKey("locations.id"), nullable=True),
+        sa.Column("created_at", sa.DateTime()),
+    )
+
+    op.create_table(
+        "user_characters",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("character_id", sa.Integer(), sa.ForeignKey("characters.id"), nullable=False),
+        sa.Column("created_at", sa.DateTime()),
+    )
+
+    op.create_table(
+        "mobs",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(255), nullable=False),
+        sa.Column("description", sa.Text()),
+        sa.Column("base_hp", sa.Integer()),
+        sa.Column("base_damage", sa.Integer()),
+        sa.Column("dice_pattern", sa.String(50)),
+        sa.Column("public_description", sa.Text()),
+        sa.Column("gm_notes", sa.Text()),
+        sa.Column("created_at", sa.DateTime()),
+    )
+
+    op.create_table(
+        "location_mobs",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("location_id", sa.Integer(), sa.ForeignKey("locations.id"), nullable=False),
+        sa.Column("mob_id", sa.Integer(), sa.ForeignKey("mobs.id"), nullable=False),
+        sa.Column("created_at", sa.DateTime()),
+    )
+
+    op.create_table(
+        "mob_instances",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("mob_id", sa.Integer(), sa.ForeignKey("mobs.id"), nullable=False),
+        sa.Column("location_id", sa.Integer(), sa.ForeignKey("locations.id"), nullable=False),
+        sa.Column("rolled_stats", sa.JSON()),
+        sa.Column("hp_current", sa.Integer()),
+        sa.Column("is_active", sa.Boolean()),
+        sa.Column("created_at", sa.DateTime()),
+    )
+
+    op.create_table(
+        "items",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(255), nullable=False),
+        sa.Column("short_description", sa.Text()),
+        sa.Column("long_description", sa.Text()),
+        sa.Column("base_stats", sa.JSON()),
+        sa.Column("rarity", sa.String(50)),
+        sa.Column("charges", sa.Integer()),
+        sa.Column("cooldown", sa.Integer()),
+        sa.Column("created_at", sa.DateTime()),
+    )
+
+    op.create_table(
+        "character_items",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("character_id", sa.Integer(), sa.ForeignKey("characters.id"), nullable=False),
+        sa.Column("item_id", sa.Integer(), sa.ForeignKey("items.id"), nullable=False),
+        sa.Column("quantity", sa.Integer()),
+        sa.Column("state", sa.String(50)),
+        sa.Column("cooldown_until", sa.DateTime(), nullable=True),
+        sa.Column("created_at", sa.DateTime()),
+    )
+
+    op.create_table(
+        "notes",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("character_id", sa.Integer(), sa.ForeignKey("characters.id"), nullable=True),
+        sa.Column("from_gm", sa.Boolean()),
+        sa.Column("text", sa.Text(), nullable=False),
+        sa.Column("visibility", sa.String(50)),
+        sa.Column("created_at", sa.DateTime()),
+    )
+
+    op.create_table(
+        "note_templates",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("text", sa.Text(), nullable=False),
+        sa.Column("visibility", sa.String(50)),
+        sa.Column("created_at", sa.DateTime()),
+    )
+
+    op.create_table(
+        "dice_rolls",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("character_id", sa.Integer(), sa.ForeignKey("characters.id"), nullable=True),
+        sa.Column("type", sa.String(20), nullable=False),
+        sa.Column("value", sa.Integer(), nullable=False),
+        sa.Column("context", sa.JSON()),
+        sa.Column("created_at", sa.DateTime()),
+    )
+
+
+def downgrade() -> None:
+    for table in [
+        "dice_rolls", "note_templates", "notes", "character_items", "items",
+        "mob_instances", "location_mobs", "mobs", "user_characters", "characters",
+        "locations",
+    ]:
+        op.drop_table(table)
+    op.drop_index("ix_users_telegram_id", table_name="users")
+    op.drop_table("users")
@@ -0,0 +1,58 @@
+"""foreign-key, lookup and pagination indexes
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+# (index name, table, columns)
+INDEXES = [
+    # Foreign keys
+    ("ix_characters_location_id", "characters", ["location_id"]),
+    ("ix_user_characters_character_id", "user_characters", ["character_id"]),
+    ("ix_location_mobs_location_id", "location_mobs", ["location_id"]),
+    ("ix_location_mobs_mob_id", "location_mobs", ["mob_id"]),
+    ("ix_mob_instances_mob_id", "mob_instances", ["mob_id"]),
+    ("ix_mob_instances_location_id", "mob_instances", ["location_id"]),
+    ("ix_character_items_character_id", "character_items", ["character_id"]),
+    ("ix_character_items_item_id", "character_items", ["item_id"]),
+    ("ix_dice_rolls_user_id", "dice_rolls", ["user_id"]),
+    # Name lookups (auth, Excel import)
+    ("ix_characters_name", "characters", ["name"]),
+    ("ix_mobs_name", "mobs", ["name"]),
+    ("ix_items_name", "items", ["name"]),
+    ("ix_locations_name", "locations", ["name"]),
+    # Latest roll per character and keyset pages, newest first
+    ("ix_dice_rolls_character_created", "dice_rolls", ["character_id", "created_at", "id"]),
+    ("ix_dice_rolls_created", "dice_rolls", ["created_at", "id"]),
+    ("ix_notes_character_created", "notes", ["character_id", "created_at", "id"]),
+    ("ix_notes_created", "notes", ["created_at", "id"]),
+]
+
+
+def upgrade() -> None:
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns)
+
+    # Case-insensitive name match for player login
+    op.create_index("ix_characters_name_lower", "characters", [sa.text("lower(name)")])
+
+    # Batch mode so SQLite (no ALTER ... ADD CONSTRAINT) can run it too
+    with op.batch_alter_table("user_characters") as batch_op:
+        batch_op.create_unique_constraint("uq_user_characters_user_character", ["user_id", "character_id"])
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("user_characters") as batch_op:
+        batch_op.drop_constraint("uq_user_characters_user_character", type_="unique")
+    op.drop_index("ix_characters_name_lower", table_name="characters")
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
@@ -0,0 +1,40 @@
+"""characters.name_key for constant-time login lookup
+
+Replaces the lower(name) functional index with a stored, indexed key.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from database import normalize_name
+
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("characters", sa.Column("name_key", sa.String(255)))
+    # Keyed in Python: SQL lower() is not casefold() (ASCII-only on SQLite,
+    # locale-dependent on Postgres) and logins look up normalize_name()
+    connection = op.get_bind()
+    rows = connection.execute(sa.text("SELECT id, name FROM characters")).all()
+    if rows:
+        connection.execute(
+            sa.text("UPDATE characters SET name_key = :name_key WHERE id = :id"),
+            [{"id": row.id, "name_key": normalize_name(row.name)} for row in rows]
+        )
+    op.create_index("ix_characters_name_key", "characters", ["name_key"])
+    op.drop_index("ix_characters_name_lower", table_name="characters")
+
+
+def downgrade() -> None:
+    op.create_index("ix_characters_name_lower", "characters", [sa.text("lower(name)")])
+    op.drop_index("ix_characters_name_key", table_name="characters")
+    with op.batch_alter_table("characters") as batch_op:
+        batch_op.drop_column("name_key")
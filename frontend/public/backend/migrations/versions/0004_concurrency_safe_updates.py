@@ -0,0 +1,46 @@
+"""unique inventory stacks and characters.version
+
+Merges duplicate (character_id, item_id) rows before adding the unique
+constraint that give_item's upsert relies on.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Keep the oldest row of each stack with the summed quantity
+    op.execute("""
+        UPDATE character_items SET quantity = (
+            SELECT SUM(COALESCE(dup.quantity, 1)) FROM character_items dup
+            WHERE dup.character_id = character_items.character_id AND dup.item_id = character_items.item_id
+        )
+        WHERE id IN (
+            SELECT MIN(id) FROM character_items GROUP BY character_id, item_id HAVING COUNT(*) > 1
+        )
+    """)
+    op.execute("""
+        DELETE FROM character_items WHERE id NOT IN (
+            SELECT MIN(id) FROM character_items GROUP BY character_id, item_id
+        )
+    """)
+    with op.batch_alter_table("character_items") as batch_op:
+        batch_op.create_unique_constraint("uq_character_items_character_item", ["character_id", "item_id"])
+
+    op.add_column("characters", sa.Column("version", sa.Integer(), nullable=False, server_default="1"))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("characters") as batch_op:
+        batch_op.drop_column("version")
+    with op.batch_alter_table("character_items") as batch_op:
+        batch_op.drop_constraint("uq_character_items_character_item", type_="unique")
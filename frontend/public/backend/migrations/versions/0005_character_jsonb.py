@@ -0,0 +1,38 @@
+"""character documents as JSONB on Postgres
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+COLUMNS = ["stats", "abilities", "notes_visible_to_player", "notes_hidden_from_player"]
+
+
+def upgrade() -> None:
+    # SQLite keeps JSON text; only Postgres has a binary type
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    for column in COLUMNS:
+        op.alter_column(
+            "characters", column,
+            type_=postgresql.JSONB(), existing_type=sa.JSON(), postgresql_using=f"{column}::jsonb"
+        )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    for column in COLUMNS:
+        op.alter_column(
+            "characters", column,
+            type_=sa.JSON(), existing_type=postgresql.JSONB(), postgresql_using=f"{column}::json"
+        )
@@ -0,0 +1,37 @@
+"""re-key characters.name_key with normalize_name()
+
+0003 used to backfill name_key with SQL lower(trim(name)), which differs
+from str.casefold() for non-ASCII names (SQLite, Postgres with a C ctype),
+so those players could not log in. Recomputes every key in Python.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from database import normalize_name
+
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    connection = op.get_bind()
+    rows = connection.execute(sa.text("SELECT id, name, name_key FROM characters")).all()
+    changed = [
+        {"id": row.id, "name_key": normalize_name(row.name)}
+        for row in rows
+        if row.name_key != normalize_name(row.name)
+    ]
+    if changed:
+        connection.execute(sa.text("UPDATE characters SET name_key = :name_key WHERE id = :id"), changed)
+
+
+def downgrade() -> None:
+    # The corrected keys are valid under every earlier revision
+    pass
@@ -0,0 +1,6 @@
+import os
+import sys
+
+# Local database for the app import; requests rejected by validation never reach it
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///./test.db")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
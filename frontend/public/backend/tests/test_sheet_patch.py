@@ -0,0 +1,24 @@
+import asyncio
+
+import httpx
+import pytest
+
+from main import app
+
+
+def patch_sheet(character_id, body):
+    async def send():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            return await client.patch(f"/api/master/character/{character_id}/sheet", json=body)
+    return asyncio.run(send())
+
+
+@pytest.mark.parametrize("field, value", [
+    ("stats", [1]),
+    ("abilities", {"fireball": 3}),
+    ("notes_visible_to_player", "text"),
+])
+def test_whole_document_set_of_wrong_type_is_rejected(field, value):
+    response = patch_sheet(1, {"operations": [{"op": "set", "field": field, "path": [], "value": value}]})
+    assert response.status_code == 422
+    assert f"{field} must be set to" in response.text